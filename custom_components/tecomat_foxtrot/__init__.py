@@ -1,15 +1,22 @@
 from __future__ import annotations
 
+import importlib
+import time
+
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_HOST, CONF_PORT, Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryNotReady
 from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 
-from .const import DOMAIN
+from .const import DOMAIN, CONF_PLATFORM_TEMPLATE
+from .discovery import detect_platforms
+from .entity import async_write_entry_states
+from .filters import BasePathFilter
+from .hub import acquire_client, async_release_client, setup_lock
 from .plccoms import PLCComSClient
 
-from . import sensor, binary_sensor, switch, light, cover, climate, event
-
 
 async def _async_reload_platforms(hass: HomeAssistant, entry: ConfigEntry) -> None:
     await hass.config_entries.async_reload(entry.entry_id)
@@ -22,14 +29,54 @@ PLATFORMS: list[Platform] = [
     Platform.LIGHT,
     Platform.COVER,
     Platform.CLIMATE,
+    Platform.EVENT,
 ]
 
+# tieto platformy sa registrujú ako prvé (najpoužívanejšie v UI)
+PRIORITY_PLATFORMS: tuple[Platform, ...] = (Platform.LIGHT, Platform.SWITCH)
+
+# modul s discovery -> HA platformy, cez ktoré sa entity pridávajú
+# (tlačidlá = event entity + počítadlové senzory, tie rieši sensor.py)
+DISCOVERY_MODULES: dict[str, tuple[Platform, ...]] = {
+    "sensor": (Platform.SENSOR,),
+    "binary_sensor": (Platform.BINARY_SENSOR,),
+    "switch": (Platform.SWITCH,),
+    "light": (Platform.LIGHT,),
+    "cover": (Platform.COVER,),
+    "climate": (Platform.CLIMATE,),
+    "event": (Platform.EVENT, Platform.SENSOR),
+}
 
-async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    client = PLCComSClient(hass, entry.data[CONF_HOST], entry.data[CONF_PORT])
-    await client.async_connect()
 
-    entry_data = {"client": client}
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    # entry s rovnakým host:port zdieľajú jedného klienta (voľby spojenia z prvej entry)
+    client = acquire_client(hass, entry.data[CONF_HOST], entry.data[CONF_PORT])
+    client.apply_options(entry.options, entry.entry_id)
+
+    try:
+        async with setup_lock(hass, client):
+            return await _async_setup_client(hass, entry, client)
+    except BaseException as err:
+        # každé zlyhanie (aj zrušenie) vráti referenciu na hub
+        entry_data = hass.data.get(DOMAIN, {}).pop(entry.entry_id, None)
+        if entry_data and entry_data.get("restart_callback"):
+            client.unregister_restart_callback(entry_data["restart_callback"])
+        client.remove_options(entry.entry_id)
+        await async_release_client(hass, client)
+        if isinstance(err, (ConnectionError, OSError)):
+            # aj PLCComSTimeout (TimeoutError) – HA skúsi setup neskôr znova
+            raise ConfigEntryNotReady(f"PLCComS {entry.data[CONF_HOST]}: {err}") from err
+        raise
+
+
+async def _async_setup_client(hass: HomeAssistant, entry: ConfigEntry, client: PLCComSClient) -> bool:
+    if not client.connected:
+        t0 = time.perf_counter()
+        await client.async_connect()
+        client.record_phase("connect", time.perf_counter() - t0)
+
+    flt = BasePathFilter.from_options(entry.options)
+    entry_data = {"client": client, "filter": flt}
     hass.data.setdefault(DOMAIN, {})[entry.entry_id] = entry_data
 
     device_registry = dr.async_get(hass)
@@ -45,45 +92,89 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     # uprav podľa výkonu PLC / siete
     BATCH = 250
 
-    platform_vars = {
-        "sensor": sensor.get_required_var_names(client),
-        "binary_sensor": binary_sensor.get_required_var_names(client),
-        "switch": switch.get_required_var_names(client),
-        "light": light.get_required_var_names(client),
-        "cover": cover.get_required_var_names(client),
-        "climate": climate.get_required_var_names(client),
-        "event": event.get_required_var_names(client),  # event rieši sensor.py
-    }
-
-    all_vars: list[str] = []
-    for v in platform_vars.values():
-        all_vars.extend(v)
-
-    values: list[str] = []
-    for i in range(0, len(all_vars), BATCH):
-        values.extend(await client.async_get_many(all_vars[i : i + BATCH]))
-
-    o = 0
-    for key, vlist in platform_vars.items():
-        entry_data[f"initial_values_{key}"] = values[o : o + len(vlist)]
-        o += len(vlist)
+    t0 = time.perf_counter()
+    # jeden prechod katalógom; importujeme len moduly, ktoré majú objekty
+    present = detect_platforms(client.variables)
+    platform_vars: dict[str, list[str]] = {}
+    group_sizes: dict[str, int] = {}
+    for key in DISCOVERY_MODULES:
+        if key not in present or not entry.options.get(CONF_PLATFORM_TEMPLATE.format(key), True):
+            continue
+        module = await hass.async_add_executor_job(importlib.import_module, f".{key}", __package__)
+        var_names = module.get_required_var_names(client, flt)
+        if var_names:
+            platform_vars[key] = var_names
+            group_sizes[key] = getattr(module, "VARS_PER_OBJECT", 1)
+
+    client.record_phase("discovery", time.perf_counter() - t0)
+
+    # s filtrom (alebo vypnutou platformou) odoberáme len premenné objektov entry
+    # (EN: po menách), inak EN:*
+    filtered = flt.active or not all(
+        entry.options.get(CONF_PLATFORM_TEMPLATE.format(key), True) for key in DISCOVERY_MODULES
+    )
+    client.set_interest(entry.entry_id, [v for vlist in platform_vars.values() for v in vlist] if filtered else None)
 
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    t0 = time.perf_counter()
+    for key, vlist in platform_vars.items():
+        # dávka nikdy nerozdelí premenné jedného objektu (VARS_PER_OBJECT)
+        group = group_sizes[key]
+        batch = max(group, BATCH - BATCH % group)
+        values: list[str] = []
+        for i in range(0, len(vlist), batch):
+            values.extend(await client.async_get_many(vlist[i : i + batch]))
+        entry_data[f"initial_values_{key}"] = values
+    client.record_phase("prefetch", time.perf_counter() - t0)
+
+    forward: list[Platform] = []
+    for key in platform_vars:
+        for platform in DISCOVERY_MODULES[key]:
+            if platform not in forward:
+                forward.append(platform)
+    entry_data["platforms"] = forward
+
+    t0 = time.perf_counter()
+    first = [p for p in forward if p in PRIORITY_PLATFORMS]
+    rest = [p for p in forward if p not in PRIORITY_PLATFORMS]
+    if first:
+        await hass.config_entries.async_forward_entry_setups(entry, first)
+    if rest:
+        await hass.config_entries.async_forward_entry_setups(entry, rest)
+    client.record_phase("platform_setup", time.perf_counter() - t0)
 
     async def on_plc_restart():
         await _async_reload_platforms(hass, entry)
 
+    entry_data["restart_callback"] = on_plc_restart
     client.register_restart_callback(on_plc_restart)
+
+    @callback
+    def on_connection(_available: bool) -> None:
+        # jeden listener na entry; entity čítajú client.available
+        async_write_entry_states(hass, entry)
+
+    entry.async_on_unload(async_dispatcher_connect(hass, client.connection_signal, on_connection))
     client.start()
+
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
     return True
 
 
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    # zmena volieb (filtre, platformy, ...) -> čistý reload
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     entry_data = hass.data[DOMAIN][entry.entry_id]
     client: PLCComSClient = entry_data["client"]
-    await client.async_disconnect()
+    if entry_data.get("restart_callback"):
+        client.unregister_restart_callback(entry_data["restart_callback"])
 
-    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, entry_data.get("platforms", PLATFORMS))
+    client.remove_options(entry.entry_id)
+    # spojenie sa zavrie až s poslednou entry na tomto host:port
+    await async_release_client(hass, client)
     if unload_ok:
         hass.data[DOMAIN].pop(entry.entry_id)
 
@@ -1,9 +1,20 @@
 from __future__ import annotations
 
+import logging
 import re
 from homeassistant.components.binary_sensor import BinarySensorEntity
 
-from .const import DOMAIN, CONTACT_BASE
+from .const import (
+    DOMAIN,
+    CONTACT_BASE,
+    CONF_CONTACT_STABLE_MS,
+    CONF_CONTACT_MIN_INTERVAL_MS,
+    CONF_CONTACT_DEBOUNCE,
+)
+from .filters import ALLOW_ALL, parse_overrides
+from .entity import Debouncer, PLCAvailability, PolledName, async_add_entities_staged, parse_debounce
+
+_LOGGER = logging.getLogger(__name__)
 
 
 def _is_numeric_like(s: str) -> bool:
@@ -45,21 +56,39 @@ def _fallback_name(base: str, plc_base: str) -> str:
     return f"Kontakt {num}".strip() if num else "Kontakt"
 
 
-def _discover(client):
+def _debounce_settings(options):
+    """Predvolené (stabilita, min. odstup) v s a výnimky podľa base path."""
+    default = (
+        float(options.get(CONF_CONTACT_STABLE_MS, 0) or 0) / 1000.0,
+        float(options.get(CONF_CONTACT_MIN_INTERVAL_MS, 0) or 0) / 1000.0,
+    )
+    overrides = []
+    try:
+        for pattern, value in parse_overrides(options.get(CONF_CONTACT_DEBOUNCE)):
+            overrides.append((pattern, parse_debounce(value)))
+    except (ValueError, re.error) as err:
+        _LOGGER.error("Invalid contact debounce overrides, ignoring them: %s", err)
+        overrides = []
+    return default, overrides
+
+
+def _discover(client, flt=ALLOW_ALL):
     items = []
     for var in client.variables:
         if not var.lower().endswith(f"{CONTACT_BASE.lower()}_state"):
             continue
         base = var.rsplit("_", 1)[0]
+        if not flt.allows(base):
+            continue
         plc_base = base.rsplit("_CONTACT", 1)[0] if "_CONTACT" in base.upper() else base
         items.append((var, base, plc_base))
     items.sort(key=lambda x: (x[2] or x[1]).lower())
     return items
 
 
-def get_required_var_names(client) -> list[str]:
+def get_required_var_names(client, flt=ALLOW_ALL) -> list[str]:
     out: list[str] = []
-    for state_var, base, _plc_base in _discover(client):
+    for state_var, base, _plc_base in _discover(client, flt):
         out.append(client.resolve_var(f"{base}_name"))
         out.append(client.resolve_var(state_var))
     return out
@@ -70,8 +99,9 @@ async def async_setup_entry(hass, entry, async_add_entities):
     client = entry_data["client"]
     entry_id = entry.entry_id
 
-    candidates = _discover(client)
+    candidates = _discover(client, entry_data.get("filter", ALLOW_ALL))
     values = entry_data.get("initial_values_binary_sensor") or []
+    default_debounce, debounce_overrides = _debounce_settings(entry.options)
 
     entities = []
     i = 0
@@ -86,15 +116,16 @@ async def async_setup_entry(hass, entry, async_add_entities):
         name = name_raw if name_raw and not _is_numeric_like(name_raw) else _fallback_name(base, plc_base)
         initial_state = state_raw in ("1", "true", "TRUE")
 
-        entities.append(TecomatBinarySensor(name, client, base, state_var, initial_state, entry_id))
+        debounce = next((d for pattern, d in debounce_overrides if pattern.match(base)), default_debounce)
+        entities.append(TecomatBinarySensor(name, client, base, state_var, initial_state, entry_id, debounce))
 
-    async_add_entities(entities)
+    await async_add_entities_staged(hass, entry, async_add_entities, entities)
 
 
-class TecomatBinarySensor(BinarySensorEntity):
+class TecomatBinarySensor(PLCAvailability, BinarySensorEntity):
     _attr_should_poll = False
 
-    def __init__(self, name, client, base, state_var, initial_state, entry_id):
+    def __init__(self, name, client, base, state_var, initial_state, entry_id, debounce=(0.0, 0.0)):
         self._attr_name = name
         self._client = client
         self._state_var = self._client.resolve_var(state_var)
@@ -102,12 +133,22 @@ class TecomatBinarySensor(BinarySensorEntity):
         self._attr_unique_id = f"{DOMAIN}:{entry_id}:{base}_state"
         self._attr_is_on = initial_state
         self._attr_device_info = {"identifiers": {(DOMAIN, entry_id)}}
-
-        self._client.register_value_entity(self._state_var, self._on_diff_value)
+        self._polled_name = PolledName(self, client, f"{base}_name")
+        self._debounce = Debouncer(self, debounce[0], debounce[1], initial_state, self._publish)
 
     def _on_diff_value(self, raw_value: str) -> None:
-        self._attr_is_on = (raw_value or "").strip() in ("1", "true", "TRUE")
+        self._debounce.feed((raw_value or "").strip() in ("1", "true", "TRUE"))
+
+    def _publish(self, is_on: bool) -> None:
+        self._attr_is_on = is_on
         self.async_write_ha_state()
 
+    async def async_added_to_hass(self) -> None:
+        # až teraz (entita má hass); zmeškané DIFF-y doručí replay
+        self._register_value(self._state_var, self._on_diff_value)
+        self._polled_name.attach()
+
     async def async_will_remove_from_hass(self) -> None:
-        self._client.unregister_value_entity(self._state_var)
\ No newline at end of file
+        self._debounce.cancel()
+        self._polled_name.detach()
+        self._client.unregister_value_entity(self._state_var, self._on_diff_value)
\ No newline at end of file
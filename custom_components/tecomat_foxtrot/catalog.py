@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import sys
+from array import array
+
+# príznaky z LIST-u (znaky za menom premennej)
+FLAG_STAR = 0x01  # "*"
+FLAG_TILDE = 0x02  # "~"
+
+
+class VariableCatalog:
+    """
+    Kompaktný katalóg premenných z LIST-u.
+
+    - mená sú internované a uložené raz (`names`, index = id premennej),
+    - index `lower(meno) -> id`; ak je meno už malými písmenami, kľúč je ten istý objekt,
+    - typ (kód do malej tabuľky typov) a príznaky sú v `array("B")` stĺpcoch.
+    """
+
+    __slots__ = ("names", "_ids", "_types", "_flags", "_type_names", "_type_codes")
+
+    def __init__(self):
+        self.names: list[str] = []
+        self._ids: dict[str, int] = {}
+        self._types = array("B")
+        self._flags = array("B")
+        self._type_names: list[str] = [""]
+        self._type_codes: dict[str, int] = {"": 0}
+
+    @classmethod
+    def from_columns(cls, names: list[str], types: list[str], flags: list[int]) -> "VariableCatalog":
+        """Postaví katalóg z výstupu parsera LIST-u (beží aj v executore)."""
+        cat = cls()
+        for name, type_name, flag in zip(names, types, flags):
+            cat.add(name, type_name, flag)
+        return cat
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def add(self, name: str, type_name: str = "", flags: int = 0) -> int:
+        key = name.lower()
+        vid = self._ids.get(key)
+        if vid is not None:
+            return vid
+
+        name = sys.intern(name)
+        if key == name:
+            key = name
+        vid = len(self.names)
+        self.names.append(name)
+        self._ids[key] = vid
+
+        code = self._type_codes.get(type_name)
+        if code is None:
+            if len(self._type_names) >= 255:
+                code = 0
+            else:
+                code = len(self._type_names)
+                self._type_names.append(sys.intern(type_name))
+                self._type_codes[type_name] = code
+        self._types.append(code)
+        self._flags.append(flags & 0xFF)
+        return vid
+
+    def id_of(self, name: str) -> int:
+        """Id premennej (bez ohľadu na veľkosť písmen) alebo -1."""
+        return self._ids.get(name.lower(), -1)
+
+    def id_of_lower(self, key: str) -> int:
+        return self._ids.get(key, -1)
+
+    def resolve(self, name: str) -> str:
+        vid = self._ids.get(name.lower())
+        return name if vid is None else self.names[vid]
+
+    def type_of(self, vid: int) -> str:
+        return self._type_names[self._types[vid]]
+
+    def flags_of(self, vid: int) -> int:
+        return self._flags[vid]
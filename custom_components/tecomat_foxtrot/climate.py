@@ -11,6 +11,8 @@ from homeassistant.core import HomeAssistant
 from homeassistant.config_entries import ConfigEntry
 
 from .const import DOMAIN, THERMOSTAT_BASE
+from .filters import ALLOW_ALL
+from .entity import CoalescedWrite, PLCAvailability, PolledName, async_add_entities_staged
 
 
 def _safe_int(s: str, default: int = 0) -> int:
@@ -27,20 +29,26 @@ def _safe_float(s: str, default: float = 0.0) -> float:
         return default
 
 
-def _discover_thermostats(client):
+def _discover_thermostats(client, flt=ALLOW_ALL):
     candidates = []
     for type_var in client.variables:
         if not type_var.lower().endswith(f"{THERMOSTAT_BASE.lower()}_type"):
             continue
         base = type_var.rsplit("_", 1)[0]
+        if not flt.allows(base):
+            continue
         plc_base = base.rsplit(f"_{THERMOSTAT_BASE}", 1)[0] if THERMOSTAT_BASE in base.upper() else base
         candidates.append((type_var, base, plc_base))
     return candidates
 
 
-def get_required_var_names(client) -> list[str]:
+# premenné jedného termostatu sa čítajú vždy v jednej dávke (konzistentný snímok)
+VARS_PER_OBJECT = 10
+
+
+def get_required_var_names(client, flt=ALLOW_ALL) -> list[str]:
     out: list[str] = []
-    for type_var, base, _plc_base in _discover_thermostats(client):
+    for type_var, base, _plc_base in _discover_thermostats(client, flt):
         out.extend(
             [
                 client.resolve_var(type_var),
@@ -63,7 +71,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
     client = entry_data["client"]
     entities = []
 
-    candidates = _discover_thermostats(client)
+    candidates = _discover_thermostats(client, entry_data.get("filter", ALLOW_ALL))
     values = entry_data.get("initial_values_climate") or []
     idx = 0
 
@@ -136,10 +144,10 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
             )
         )
 
-    async_add_entities(entities)
+    await async_add_entities_staged(hass, entry, async_add_entities, entities)
 
 
-class TecomatThermostat(ClimateEntity):
+class TecomatThermostat(PLCAvailability, ClimateEntity):
     _attr_has_entity_name = False
     _attr_supported_features = ClimateEntityFeature.TARGET_TEMPERATURE
     _attr_should_poll = False
@@ -177,6 +185,9 @@ class TecomatThermostat(ClimateEntity):
         self._attr_min_temp = min_t
         self._attr_max_temp = max_t
 
+        self._polled_name = PolledName(self, client, f"{base}_name")
+        self._state_write = CoalescedWrite(self)
+
         self._setpoint_var = self._client.resolve_var(f"{base}_setpoint")
         self._meastemp_var = self._client.resolve_var(f"{base}_meastemp")
 
@@ -211,20 +222,22 @@ class TecomatThermostat(ClimateEntity):
             self._heat_active_state = heat_active
             self._cool_active_state = is_active
 
-            if is_on:
-                self._attr_hvac_mode = HVACMode.HEAT if heat_mode_state else HVACMode.COOL
-            else:
-                self._attr_hvac_mode = HVACMode.OFF
-
-            self._update_hvac_action()
-
-        self._client.register_value_entity(self._setpoint_var, self._on_diff_setpoint)
-        self._client.register_value_entity(self._meastemp_var, self._on_diff_meas)
-        self._client.register_value_entity(self._mode_var, self._on_diff_mode)
-        self._client.register_value_entity(self._active_var, self._on_diff_active)
-        if self._type == 3:
-            self._client.register_value_entity(self._heatmode_var, self._on_diff_heatmode)
-            self._client.register_value_entity(self._heat_var, self._on_diff_heat)
+            self._attr_hvac_mode = HVACMode.OFF
+            self._derive_mode3()
+
+    def _derive_mode3(self):
+        """Typ 3: režim z oboch príznakov naraz (nezáleží na poradí DIFF-ov)."""
+        if self._heat_mode_state and self._cool_mode_state:
+            # prechodný stav – ostávame pri aktuálnom režime, ak je platný
+            if self._attr_hvac_mode not in (HVACMode.HEAT, HVACMode.COOL):
+                self._attr_hvac_mode = HVACMode.HEAT
+        elif self._heat_mode_state:
+            self._attr_hvac_mode = HVACMode.HEAT
+        elif self._cool_mode_state:
+            self._attr_hvac_mode = HVACMode.COOL
+        else:
+            self._attr_hvac_mode = HVACMode.OFF
+        self._update_hvac_action()
 
     def _update_hvac_action(self):
         if self._attr_hvac_mode == HVACMode.OFF:
@@ -243,14 +256,14 @@ class TecomatThermostat(ClimateEntity):
     def _on_diff_setpoint(self, value):
         try:
             self._attr_target_temperature = float((value or "").replace(",", "."))
-            self.async_write_ha_state()
+            self._state_write.schedule()
         except Exception:
             pass
 
     def _on_diff_meas(self, value):
         try:
             self._attr_current_temperature = float((value or "").replace(",", "."))
-            self.async_write_ha_state()
+            self._state_write.schedule()
         except Exception:
             pass
 
@@ -263,14 +276,9 @@ class TecomatThermostat(ClimateEntity):
             self._attr_hvac_mode = HVACMode.HEAT if state else HVACMode.OFF
         else:
             self._cool_mode_state = state
-            if self._attr_hvac_mode == HVACMode.OFF and state:
-                self._attr_hvac_mode = HVACMode.COOL
-            elif not state and not self._heat_mode_state:
-                self._attr_hvac_mode = HVACMode.OFF
+            self._derive_mode3()
 
-        if self._type == 3:
-            self._update_hvac_action()
-        self.async_write_ha_state()
+        self._state_write.schedule()
 
     def _on_diff_active(self, value):
         active = (value or "").strip() in ("1", "true", "TRUE")
@@ -283,21 +291,17 @@ class TecomatThermostat(ClimateEntity):
             self._cool_active_state = active
             self._update_hvac_action()
 
-        self.async_write_ha_state()
+        self._state_write.schedule()
 
     def _on_diff_heatmode(self, value):
         self._heat_mode_state = (value or "").strip() in ("1", "true", "TRUE")
-        if self._attr_hvac_mode == HVACMode.OFF and self._heat_mode_state:
-            self._attr_hvac_mode = HVACMode.HEAT
-        elif not self._heat_mode_state and not self._cool_mode_state:
-            self._attr_hvac_mode = HVACMode.OFF
-        self._update_hvac_action()
-        self.async_write_ha_state()
+        self._derive_mode3()
+        self._state_write.schedule()
 
     def _on_diff_heat(self, value):
         self._heat_active_state = (value or "").strip() in ("1", "true", "TRUE")
         self._update_hvac_action()
-        self.async_write_ha_state()
+        self._state_write.schedule()
 
     async def async_set_temperature(self, **kwargs):
         if ATTR_TEMPERATURE not in kwargs:
@@ -310,21 +314,34 @@ class TecomatThermostat(ClimateEntity):
         elif self._type == 2:
             await self._client.async_set(self._mode_var, "1" if hvac_mode == HVACMode.HEAT else "0")
         else:
+            # oba príznaky jedným zápisom – PLC nevidí medzistav
             if hvac_mode == HVACMode.OFF:
-                await self._client.async_set(self._mode_var, "0")
-                await self._client.async_set(self._heatmode_var, "0")
+                items = [(self._mode_var, "0"), (self._heatmode_var, "0")]
             elif hvac_mode == HVACMode.COOL:
-                await self._client.async_set(self._heatmode_var, "0")
-                await self._client.async_set(self._mode_var, "1")
+                items = [(self._heatmode_var, "0"), (self._mode_var, "1")]
             elif hvac_mode == HVACMode.HEAT:
-                await self._client.async_set(self._mode_var, "0")
-                await self._client.async_set(self._heatmode_var, "1")
+                items = [(self._mode_var, "0"), (self._heatmode_var, "1")]
+            else:
+                return
+            await self._client.async_set_many(items)
+
+    async def async_added_to_hass(self) -> None:
+        # až teraz (entita má hass); zmeškané DIFF-y doručí replay
+        self._register_value(self._setpoint_var, self._on_diff_setpoint)
+        self._register_value(self._meastemp_var, self._on_diff_meas)
+        self._register_value(self._mode_var, self._on_diff_mode)
+        self._register_value(self._active_var, self._on_diff_active)
+        if self._type == 3:
+            self._register_value(self._heatmode_var, self._on_diff_heatmode)
+            self._register_value(self._heat_var, self._on_diff_heat)
+        self._polled_name.attach()
 
     async def async_will_remove_from_hass(self) -> None:
-        self._client.unregister_value_entity(self._setpoint_var)
-        self._client.unregister_value_entity(self._meastemp_var)
-        self._client.unregister_value_entity(self._mode_var)
-        self._client.unregister_value_entity(self._active_var)
+        self._polled_name.detach()
+        self._client.unregister_value_entity(self._setpoint_var, self._on_diff_setpoint)
+        self._client.unregister_value_entity(self._meastemp_var, self._on_diff_meas)
+        self._client.unregister_value_entity(self._mode_var, self._on_diff_mode)
+        self._client.unregister_value_entity(self._active_var, self._on_diff_active)
         if self._type == 3:
-            self._client.unregister_value_entity(self._heatmode_var)
-            self._client.unregister_value_entity(self._heat_var)
\ No newline at end of file
+            self._client.unregister_value_entity(self._heatmode_var, self._on_diff_heatmode)
+            self._client.unregister_value_entity(self._heat_var, self._on_diff_heat)
\ No newline at end of file
@@ -1,14 +1,73 @@
 import asyncio
+import re
+
 import voluptuous as vol
 from homeassistant import config_entries
+from homeassistant.core import callback
+from homeassistant.helpers import selector
 
-from .const import DOMAIN, CONF_HOST, CONF_PORT, DEFAULT_PORT
+from .const import (
+    DOMAIN,
+    CONF_HOST,
+    CONF_PORT,
+    DEFAULT_PORT,
+    CONF_INCLUDE,
+    CONF_EXCLUDE,
+    CONF_PLATFORM_TEMPLATE,
+    OPTION_PLATFORMS,
+    CONF_OPTIMISTIC,
+    CONF_OPTIMISTIC_TIMEOUT,
+    CONF_CLICK_WINDOW_MS,
+    DEFAULT_CLICK_WINDOW_MS,
+    DEFAULT_OPTIMISTIC_TIMEOUT,
+    CONF_IDLE_TIMEOUT,
+    DEFAULT_IDLE_TIMEOUT,
+    CONF_PROFILE,
+    CONF_PROFILE_THRESHOLD_MS,
+    DEFAULT_PROFILE_THRESHOLD_MS,
+    CONF_SWEEP_INTERVAL,
+    DEFAULT_SWEEP_INTERVAL,
+    CONF_NAME_POLL_INTERVAL,
+    POLL_TICK,
+    CONF_WRITE_RATE,
+    DEFAULT_WRITE_RATE,
+    CONF_WRITE_VAR_RATE,
+    DEFAULT_WRITE_VAR_RATE,
+    CONF_WRITE_POLICY,
+    WRITE_POLICY_MERGE,
+    WRITE_POLICY_REJECT,
+    CONF_REQUEST_TIMEOUT,
+    DEFAULT_REQUEST_TIMEOUT,
+    CONF_CONNECTIONS,
+    DEFAULT_CONNECTIONS,
+    MAX_CONNECTIONS,
+    CONF_JOURNAL_TTL,
+    DEFAULT_JOURNAL_TTL,
+    CONF_REFLEX,
+    CONF_COVER_TRAVEL_TIME,
+    CONF_CONTACT_STABLE_MS,
+    CONF_CONTACT_MIN_INTERVAL_MS,
+    CONF_CONTACT_DEBOUNCE,
+    CONF_STATS_WINDOWS,
+    CONF_STATS_INCLUDE,
+    CONF_STATS_INTERVAL,
+    DEFAULT_STATS_INTERVAL,
+)
+from .entity import parse_debounce
+from .filters import compile_patterns, parse_overrides, split_patterns
+from .reflex import parse_bindings
+from .stats import parse_windows
 from .plccoms import PLCComSClient
 
 
 class TecomatFoxtrotConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        return TecomatFoxtrotOptionsFlow(config_entry)
+
     async def async_step_user(self, user_input=None):
         errors = {}
 
@@ -40,4 +99,109 @@ class TecomatFoxtrotConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 vol.Optional(CONF_PORT, default=DEFAULT_PORT): int,
             }
         )
-        return self.async_show_form(step_id="user", data_schema=schema, errors=errors)
\ No newline at end of file
+        return self.async_show_form(step_id="user", data_schema=schema, errors=errors)
+
+
+class TecomatFoxtrotOptionsFlow(config_entries.OptionsFlow):
+    def __init__(self, config_entry):
+        self._entry = config_entry
+
+    async def async_step_init(self, user_input=None):
+        errors = {}
+
+        if user_input is not None:
+            for key in (CONF_INCLUDE, CONF_EXCLUDE, CONF_STATS_INCLUDE):
+                try:
+                    compile_patterns(split_patterns(user_input.get(key)))
+                except re.error:
+                    errors[key] = "invalid_pattern"
+            try:
+                for _pattern, value in parse_overrides(user_input.get(CONF_CONTACT_DEBOUNCE)):
+                    parse_debounce(value)
+            except (ValueError, re.error):
+                errors[CONF_CONTACT_DEBOUNCE] = "invalid_override"
+            try:
+                parse_windows(user_input.get(CONF_STATS_WINDOWS))
+            except ValueError:
+                errors[CONF_STATS_WINDOWS] = "invalid_windows"
+            try:
+                parse_bindings(user_input.get(CONF_REFLEX))
+            except ValueError:
+                errors[CONF_REFLEX] = "invalid_reflex"
+
+            if not errors:
+                return self.async_create_entry(title="", data=user_input)
+
+        opts = {**self._entry.options, **(user_input or {})}
+
+        fields = {
+            vol.Optional(CONF_INCLUDE, default=opts.get(CONF_INCLUDE, "")): str,
+            vol.Optional(CONF_EXCLUDE, default=opts.get(CONF_EXCLUDE, "")): str,
+        }
+        for platform in OPTION_PLATFORMS:
+            key = CONF_PLATFORM_TEMPLATE.format(platform)
+            fields[vol.Optional(key, default=opts.get(key, True))] = bool
+        fields.update(
+            {
+                vol.Optional(
+                    CONF_CLICK_WINDOW_MS, default=opts.get(CONF_CLICK_WINDOW_MS, DEFAULT_CLICK_WINDOW_MS)
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=2000)),
+                vol.Optional(CONF_OPTIMISTIC, default=opts.get(CONF_OPTIMISTIC, False)): bool,
+                vol.Optional(
+                    CONF_OPTIMISTIC_TIMEOUT, default=opts.get(CONF_OPTIMISTIC_TIMEOUT, DEFAULT_OPTIMISTIC_TIMEOUT)
+                ): vol.All(vol.Coerce(float), vol.Range(min=0.5, max=60)),
+                vol.Optional(CONF_COVER_TRAVEL_TIME, default=opts.get(CONF_COVER_TRAVEL_TIME, 0)): vol.All(
+                    vol.Coerce(float), vol.Range(min=0, max=300)
+                ),
+                vol.Optional(CONF_CONTACT_STABLE_MS, default=opts.get(CONF_CONTACT_STABLE_MS, 0)): vol.All(
+                    vol.Coerce(int), vol.Range(min=0, max=60000)
+                ),
+                vol.Optional(
+                    CONF_CONTACT_MIN_INTERVAL_MS, default=opts.get(CONF_CONTACT_MIN_INTERVAL_MS, 0)
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=600000)),
+                vol.Optional(CONF_CONTACT_DEBOUNCE, default=opts.get(CONF_CONTACT_DEBOUNCE, "")): selector.TextSelector(
+                    selector.TextSelectorConfig(multiline=True)
+                ),
+                vol.Optional(CONF_STATS_WINDOWS, default=opts.get(CONF_STATS_WINDOWS, "")): str,
+                vol.Optional(CONF_STATS_INCLUDE, default=opts.get(CONF_STATS_INCLUDE, "")): str,
+                vol.Optional(
+                    CONF_STATS_INTERVAL, default=opts.get(CONF_STATS_INTERVAL, DEFAULT_STATS_INTERVAL)
+                ): vol.All(vol.Coerce(int), vol.Range(min=5, max=3600)),
+                vol.Optional(
+                    CONF_IDLE_TIMEOUT, default=opts.get(CONF_IDLE_TIMEOUT, DEFAULT_IDLE_TIMEOUT)
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=600)),
+                vol.Optional(
+                    CONF_SWEEP_INTERVAL, default=opts.get(CONF_SWEEP_INTERVAL, DEFAULT_SWEEP_INTERVAL)
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=86400)),
+                vol.Optional(
+                    CONF_NAME_POLL_INTERVAL, default=opts.get(CONF_NAME_POLL_INTERVAL, 0)
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=86400), vol.Any(0.0, vol.Range(min=POLL_TICK))),
+                vol.Optional(
+                    CONF_REQUEST_TIMEOUT, default=opts.get(CONF_REQUEST_TIMEOUT, DEFAULT_REQUEST_TIMEOUT)
+                ): vol.All(vol.Coerce(float), vol.Range(min=1, max=120)),
+                vol.Optional(
+                    CONF_CONNECTIONS, default=opts.get(CONF_CONNECTIONS, DEFAULT_CONNECTIONS)
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=MAX_CONNECTIONS)),
+                vol.Optional(
+                    CONF_WRITE_RATE, default=opts.get(CONF_WRITE_RATE, DEFAULT_WRITE_RATE)
+                ): vol.All(vol.Coerce(float), vol.Range(min=1, max=1000)),
+                vol.Optional(
+                    CONF_WRITE_VAR_RATE, default=opts.get(CONF_WRITE_VAR_RATE, DEFAULT_WRITE_VAR_RATE)
+                ): vol.All(vol.Coerce(float), vol.Range(min=0.1, max=1000)),
+                vol.Optional(CONF_WRITE_POLICY, default=opts.get(CONF_WRITE_POLICY, WRITE_POLICY_MERGE)): vol.In(
+                    [WRITE_POLICY_MERGE, WRITE_POLICY_REJECT]
+                ),
+                vol.Optional(
+                    CONF_JOURNAL_TTL, default=opts.get(CONF_JOURNAL_TTL, DEFAULT_JOURNAL_TTL)
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=3600)),
+                vol.Optional(CONF_REFLEX, default=opts.get(CONF_REFLEX, "")): selector.TextSelector(
+                    selector.TextSelectorConfig(multiline=True)
+                ),
+                vol.Optional(CONF_PROFILE, default=opts.get(CONF_PROFILE, False)): bool,
+                vol.Optional(
+                    CONF_PROFILE_THRESHOLD_MS, default=opts.get(CONF_PROFILE_THRESHOLD_MS, DEFAULT_PROFILE_THRESHOLD_MS)
+                ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+            }
+        )
+
+        return self.async_show_form(step_id="init", data_schema=vol.Schema(fields), errors=errors)
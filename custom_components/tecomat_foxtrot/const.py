@@ -16,6 +16,7 @@ SENSOR_DISPLAY_SYMBOL_CO = 105
 DISP = "GTSAP1_DISPLAY"
 CONTACT_BASE = "GTSAP1_CONTACT"
 SOCKET_BASE = "GTSAP1_SOCKET"
+RELAY_BASE = "GTSAP1_RELAY"
 LIGHT_BASE = "GTSAP1_LIGHT"
 COVER_BASE = "GTSAP1_OPENER"
 THERMOSTAT_BASE = "GTSAP1_THERMOSTAT"
@@ -26,4 +27,133 @@ SUBSCRIBE_WILDCARD = "EN:*"
 ENCODING = "cp1250"
 
 RECONNECT_MIN_DELAY = 2
-RECONNECT_MAX_DELAY = 30
\ No newline at end of file
+RECONNECT_MAX_DELAY = 30
+# počet posledných riadkov protokolu držaných v pamäti (diagnostika)
+TRACE_SIZE = 512
+
+# voľby (entry.options); v UI až cez TecomatFoxtrotOptionsFlow (dovtedy platia predvolené)
+CONF_PROFILE = "profile_callbacks"
+CONF_PROFILE_THRESHOLD_MS = "profile_threshold_ms"
+DEFAULT_PROFILE_THRESHOLD_MS = 20
+
+# meranie latencie SET -> potvrdzujúci DIFF
+SET_CONFIRM_TIMEOUT = 5.0
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2000, 5000)
+
+# optimistický stav (switch, light, cover); zapína sa v options flow
+CONF_OPTIMISTIC = "optimistic"
+CONF_OPTIMISTIC_TIMEOUT = "optimistic_timeout"
+DEFAULT_OPTIMISTIC_TIMEOUT = 3.0
+
+# watchdog ticha na spojení (idle_timeout z options flow, inak predvolený)
+CONF_IDLE_TIMEOUT = "idle_timeout"
+DEFAULT_IDLE_TIMEOUT = 30.0
+IDLE_PROBE = "GET:__plc_run"
+IDLE_PROBE_TIMEOUT = 5.0
+TCP_KEEPALIVE_IDLE = 10
+TCP_KEEPALIVE_INTERVAL = 5
+TCP_KEEPALIVE_COUNT = 3
+
+# čítanie LIST-u po blokoch; veľké bloky / katalógy sa spracujú v executore
+LIST_CHUNK_SIZE = 256 * 1024
+LIST_EXECUTOR_BYTES = 64 * 1024
+LIST_EXECUTOR_VARS = 20000
+
+# filtre objektov a zapínanie platforiem (options flow)
+CONF_INCLUDE = "include"
+CONF_EXCLUDE = "exclude"
+CONF_PLATFORM_TEMPLATE = "platform_{}"
+OPTION_PLATFORMS = ["light", "switch", "cover", "climate", "binary_sensor", "sensor", "event"]
+
+# postupná registrácia entít (veľké projekty)
+ENTITY_ADD_CHUNK = 200
+ENTITY_ADD_DELAY = 0.05
+
+# anti-entropy: periodické overenie odoberaných premenných (s, 0 = vypnuté)
+CONF_SWEEP_INTERVAL = "sweep_interval"
+DEFAULT_SWEEP_INTERVAL = 900.0
+SWEEP_BATCH = 50
+
+# poll fallback (premenné bez DIFF, napr. texty _name)
+CONF_NAME_POLL_INTERVAL = "name_poll_interval"
+POLL_TICK = 1.0
+POLL_JITTER = 0.1
+POLL_MAX_BATCH = 200
+
+# obmedzovač zápisov (SET/s na spojenie a na premennú)
+CONF_WRITE_RATE = "write_rate"
+DEFAULT_WRITE_RATE = 50.0
+CONF_WRITE_VAR_RATE = "write_var_rate"
+DEFAULT_WRITE_VAR_RATE = 5.0
+CONF_WRITE_POLICY = "write_policy"
+WRITE_POLICY_MERGE = "merge"
+WRITE_POLICY_REJECT = "reject"
+WRITE_QUEUE_DEPTH = 500
+
+# termíny požiadaviek (s); LIST má len timeout nečinnosti medzi blokmi
+CONF_REQUEST_TIMEOUT = "request_timeout"
+DEFAULT_REQUEST_TIMEOUT = 10.0
+CONNECT_TIMEOUT = 10.0
+LIST_IDLE_TIMEOUT = 30.0
+CLOSE_TIMEOUT = 5.0
+
+# reštart PLC: pauza pred novým LIST-om (bočné spojenie) a počet pokusov
+RESTART_SETTLE_DELAY = 2.0
+RESTART_LIST_ATTEMPTS = 3
+
+# udalosti tlačidiel: okno pre viacnásobný klik, max. rozumný prírastok počítadla
+CONF_CLICK_WINDOW_MS = "click_window_ms"
+DEFAULT_CLICK_WINDOW_MS = 400
+BUTTON_MAX_DELTA = 16
+BUTTON_DEFAULT_MODULUS = 1 << 16
+# rozsah počítadla podľa typu z LIST-u (pretečenie)
+COUNTER_TYPE_MODULUS = {
+    "byte": 1 << 8,
+    "usint": 1 << 8,
+    "sint": 1 << 8,
+    "word": 1 << 16,
+    "uint": 1 << 16,
+    "int": 1 << 16,
+    "dword": 1 << 32,
+    "udint": 1 << 32,
+    "dint": 1 << 32,
+}
+
+# lokálne reflexné väzby PLC vstup -> výstup (YAML v options flow)
+CONF_REFLEX = "reflex_bindings"
+
+# interpolácia polohy krytu počas pohybu (čas plného prejazdu, 0 = naučiť sa)
+CONF_COVER_TRAVEL_TIME = "cover_travel_time"
+COVER_FALLBACK_TRAVEL_TIME = 30.0
+COVER_TRAVEL_LIMITS = (3.0, 300.0)
+COVER_TICK = 0.5
+COVER_LEARN_MIN_STEP = 5
+COVER_LEARN_ALPHA = 0.3
+
+# potlačenie zákmitov kontaktov (ms); výnimky "vzor = stabilita[/min. odstup]"
+CONF_CONTACT_STABLE_MS = "contact_stable_ms"
+CONF_CONTACT_MIN_INTERVAL_MS = "contact_min_interval_ms"
+CONF_CONTACT_DEBOUNCE = "contact_debounce_overrides"
+
+# odvodené štatistiky displejov (okná v minútach, publikovanie každých N s)
+CONF_STATS_WINDOWS = "stats_windows"
+CONF_STATS_INCLUDE = "stats_include"
+CONF_STATS_INTERVAL = "stats_interval"
+DEFAULT_STATS_INTERVAL = 60
+STATS_BINS = 120  # košov na okno (60 min -> 30 s)
+
+# zdieľané spojenia (jeden klient na host:port pre všetky config entry)
+HUBS_KEY = f"{DOMAIN}_hubs"
+
+# delenie odberu (EN:) na viac spojení podľa stabilného hashu názvu premennej
+CONF_CONNECTIONS = "connections"
+DEFAULT_CONNECTIONS = 1
+MAX_CONNECTIONS = 8
+
+# žurnál SET-ov počas výpadku spojenia (platnosť v s, 0 = vypnuté)
+CONF_JOURNAL_TTL = "journal_ttl"
+DEFAULT_JOURNAL_TTL = 30
+JOURNAL_DEPTH = 200
+
+# dispatcher signál pri zmene stavu spojenia klienta (formát: host:port)
+SIGNAL_CONNECTION = f"{DOMAIN}_connection_{{}}"
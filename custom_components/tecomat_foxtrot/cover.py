@@ -1,21 +1,39 @@
 from __future__ import annotations
 
+import time
+
 from homeassistant.components.cover import (
     CoverEntity,
     CoverEntityFeature,
     CoverDeviceClass,
 )
 
-from .const import DOMAIN, COVER_BASE
+from .const import (
+    DOMAIN,
+    COVER_BASE,
+    CONF_OPTIMISTIC,
+    CONF_OPTIMISTIC_TIMEOUT,
+    DEFAULT_OPTIMISTIC_TIMEOUT,
+    CONF_COVER_TRAVEL_TIME,
+    COVER_FALLBACK_TRAVEL_TIME,
+    COVER_TRAVEL_LIMITS,
+    COVER_TICK,
+    COVER_LEARN_MIN_STEP,
+    COVER_LEARN_ALPHA,
+)
+from .entity import OptimisticState, PLCAvailability, PolledName, async_add_entities_staged
+from .filters import ALLOW_ALL
 
 
-def _discover_covers(client):
+def _discover_covers(client, flt=ALLOW_ALL):
     candidates = []
     seen = set()
     for var in client.variables:
         if not var.lower().endswith(f"{COVER_BASE.lower()}_current"):
             continue
         base = var.rsplit("_", 1)[0]
+        if not flt.allows(base):
+            continue
         plc_base = base.rsplit("_OPENER", 1)[0] if "_OPENER" in base.upper() else base
         key = plc_base.lower()
         if key in seen:
@@ -25,9 +43,9 @@ def _discover_covers(client):
     return candidates
 
 
-def get_required_var_names(client) -> list[str]:
+def get_required_var_names(client, flt=ALLOW_ALL) -> list[str]:
     out: list[str] = []
-    for current_var, base, _plc_base in _discover_covers(client):
+    for current_var, base, _plc_base in _discover_covers(client, flt):
         out.extend([client.resolve_var(f"{base}_name"), client.resolve_var(current_var)])
     return out
 
@@ -37,8 +55,14 @@ async def async_setup_entry(hass, entry, async_add_entities):
     client = entry_data["client"]
     entities = []
 
-    candidates = _discover_covers(client)
+    candidates = _discover_covers(client, entry_data.get("filter", ALLOW_ALL))
     values = entry_data.get("initial_values_cover") or []
+    optimistic_timeout = (
+        entry.options.get(CONF_OPTIMISTIC_TIMEOUT, DEFAULT_OPTIMISTIC_TIMEOUT)
+        if entry.options.get(CONF_OPTIMISTIC, False)
+        else 0
+    )
+    travel_time = float(entry.options.get(CONF_COVER_TRAVEL_TIME, 0) or 0)
     idx = 0
 
     for current_var, base, plc_base in candidates:
@@ -53,15 +77,17 @@ async def async_setup_entry(hass, entry, async_add_entities):
         except Exception:
             continue
 
-        entities.append(TecomatCover(name, client, plc_base, base, initial_pos, entry.entry_id))
+        entities.append(
+            TecomatCover(name, client, plc_base, base, initial_pos, entry.entry_id, optimistic_timeout, travel_time)
+        )
 
-    async_add_entities(entities)
+    await async_add_entities_staged(hass, entry, async_add_entities, entities)
 
 
-class TecomatCover(CoverEntity):
+class TecomatCover(PLCAvailability, CoverEntity):
     _attr_should_poll = False
 
-    def __init__(self, name, client, plc_base, base, initial_pos, entry_id):
+    def __init__(self, name, client, plc_base, base, initial_pos, entry_id, optimistic_timeout=0, travel_time=0.0):
         self._attr_name = name
         self._client = client
         self._base = base
@@ -73,6 +99,16 @@ class TecomatCover(CoverEntity):
         self._attr_unique_id = f"{DOMAIN}:{plc_base}_opener"
         self._attr_current_cover_position = initial_pos
         self._is_moving = False
+        self._target_pos: int | None = None  # posledný cieľ zadaný z HA (smer pohybu)
+        self._optimistic = OptimisticState(self, optimistic_timeout)
+        self._polled_name = PolledName(self, client, f"{base}_name")
+
+        # interpolácia: kotva = posledná skutočná poloha z PLC (čas, %), smer +1/-1
+        self._travel_fixed = travel_time > 0
+        self._travel_time = travel_time if travel_time > 0 else COVER_FALLBACK_TRAVEL_TIME
+        self._anchor: tuple[float, int] | None = None
+        self._direction = 0
+        self._tick = None
 
         self._attr_device_info = {"identifiers": {(DOMAIN, entry_id)}}
 
@@ -88,9 +124,6 @@ class TecomatCover(CoverEntity):
             | CoverEntityFeature.SET_POSITION
         )
 
-        self._client.register_value_entity(self._current_var, self._on_diff_pos)
-        self._client.register_value_entity(self._moving_var, self._on_diff_moving)
-
     @property
     def is_closed(self) -> bool | None:
         if self._attr_current_cover_position is None:
@@ -99,37 +132,149 @@ class TecomatCover(CoverEntity):
 
     @property
     def is_opening(self) -> bool:
+        if self._is_moving and self._target_pos is not None:
+            return self._target_pos > (self._attr_current_cover_position or 0)
         return self._is_moving and (self._attr_current_cover_position or 0) < 99
 
     @property
     def is_closing(self) -> bool:
+        if self._is_moving and self._target_pos is not None:
+            return self._target_pos < (self._attr_current_cover_position or 0)
         return self._is_moving and (self._attr_current_cover_position or 0) > 1
 
+    @property
+    def extra_state_attributes(self):
+        return {"travel_time": round(self._travel_time, 1), "travel_time_learned": not self._travel_fixed}
+
     def _on_diff_pos(self, value):
         try:
-            self._attr_current_cover_position = int(float((value or "").strip().replace(",", ".")))
-            self.async_write_ha_state()
+            pos = int(float((value or "").strip().replace(",", ".")))
         except (ValueError, TypeError):
-            pass
+            return
+        now = time.monotonic()
+        if self._is_moving and self._anchor is not None:
+            t0, p0 = self._anchor
+            if pos != p0:
+                self._direction = 1 if pos > p0 else -1
+            self._learn_travel(abs(pos - p0), now - t0)
+        self._anchor = (now, pos)
+        if pos != self._attr_current_cover_position:
+            self._attr_current_cover_position = pos
+            self.async_write_ha_state()
 
     def _on_diff_moving(self, value):
+        self._optimistic.confirm()
         self._is_moving = (value or "").strip() in ("1", "true", "TRUE")
+        if self._is_moving:
+            self._start_interpolation()
+        else:
+            self._stop_interpolation()
+            self._target_pos = None
+            # s hrubým deadbandom na _current nemusí koncová poloha prísť DIFF-om
+            self.hass.async_create_task(self._async_refresh_position())
         self.async_write_ha_state()
 
+    def _learn_travel(self, step: int, elapsed: float) -> None:
+        """Čas prejazdu z dvoch skutočných polôh počas jedného pohybu (EMA)."""
+        if self._travel_fixed or step < COVER_LEARN_MIN_STEP or elapsed <= 0:
+            return
+        lo, hi = COVER_TRAVEL_LIMITS
+        sample = min(hi, max(lo, elapsed * 100.0 / step))
+        self._travel_time += COVER_LEARN_ALPHA * (sample - self._travel_time)
+
+    def _start_interpolation(self) -> None:
+        pos = self._attr_current_cover_position or 0
+        self._anchor = (time.monotonic(), pos)
+        if self._target_pos is not None and self._target_pos != pos:
+            self._direction = 1 if self._target_pos > pos else -1
+        else:
+            self._direction = 0  # smer určí prvý DIFF polohy
+        if self._tick is None:
+            self._tick = self.hass.loop.call_later(COVER_TICK, self._interpolate)
+
+    def _stop_interpolation(self) -> None:
+        if self._tick is not None:
+            self._tick.cancel()
+            self._tick = None
+        self._direction = 0
+
+    def _interpolate(self) -> None:
+        self._tick = None
+        if not self._is_moving:
+            return
+        self._tick = self.hass.loop.call_later(COVER_TICK, self._interpolate)
+        if not self._direction or self._anchor is None:
+            return
+
+        t0, p0 = self._anchor
+        est = p0 + self._direction * (time.monotonic() - t0) * 100.0 / self._travel_time
+        # neprekročiť cieľ ani krajné polohy; presnú polohu doplní PLC
+        lo, hi = 0, 100
+        if self._target_pos is not None:
+            if self._direction > 0:
+                hi = self._target_pos
+            else:
+                lo = self._target_pos
+        pos = int(round(min(hi, max(lo, est))))
+        if pos != self._attr_current_cover_position:
+            self._attr_current_cover_position = pos
+            self.async_write_ha_state()
+
+    async def _async_refresh_position(self) -> None:
+        try:
+            value = await self._client.async_get(self._current_var)
+        except (ConnectionError, OSError):
+            return
+        if not self._is_moving:
+            self._on_diff_pos(value)
+
+    async def _async_move_to(self, pos: int) -> None:
+        current = self._attr_current_cover_position or 0
+        if self._optimistic.enabled and pos != current:
+            prev_moving = self._is_moving
+            prev_target = self._target_pos
+
+            def rollback() -> None:
+                self._is_moving = prev_moving
+                self._target_pos = prev_target
+                self.async_write_ha_state()
+
+            self._optimistic.begin(rollback)
+            self._is_moving = True
+            self._target_pos = pos
+            self.async_write_ha_state()
+        else:
+            self._target_pos = pos
+
+        try:
+            await self._client.async_set(self._target_var, str(pos))
+        except Exception:
+            self._optimistic.cancel()
+            raise
+
     async def async_open_cover(self, **kwargs):
-        await self._client.async_set(self._target_var, "100")
+        await self._async_move_to(100)
 
     async def async_close_cover(self, **kwargs):
-        await self._client.async_set(self._target_var, "0")
+        await self._async_move_to(0)
 
     async def async_set_cover_position(self, **kwargs):
         pos = int(kwargs.get("position", 0))
         pos = max(0, min(100, pos))
-        await self._client.async_set(self._target_var, str(pos))
+        await self._async_move_to(pos)
 
     async def async_stop_cover(self, **kwargs):
         await self._client.async_set(self._target_var, str(self._attr_current_cover_position or 0))
 
+    async def async_added_to_hass(self) -> None:
+        # až teraz (entita má hass); zmeškané DIFF-y doručí replay
+        self._register_value(self._current_var, self._on_diff_pos)
+        self._register_value(self._moving_var, self._on_diff_moving)
+        self._polled_name.attach()
+
     async def async_will_remove_from_hass(self) -> None:
-        self._client.unregister_value_entity(self._current_var)
-        self._client.unregister_value_entity(self._moving_var)
\ No newline at end of file
+        self._stop_interpolation()
+        self._polled_name.detach()
+        self._optimistic.confirm()
+        self._client.unregister_value_entity(self._current_var, self._on_diff_pos)
+        self._client.unregister_value_entity(self._moving_var, self._on_diff_moving)
\ No newline at end of file
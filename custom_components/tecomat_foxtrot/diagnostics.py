@@ -0,0 +1,14 @@
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .hub import client_refs
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    client = hass.data[DOMAIN][entry.entry_id]["client"]
+    return {**client.diagnostics(), "shared_entries": client_refs(hass, client)}
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from .const import (
+    DISP,
+    CONTACT_BASE,
+    SOCKET_BASE,
+    RELAY_BASE,
+    LIGHT_BASE,
+    COVER_BASE,
+    THERMOSTAT_BASE,
+    BUTTON_BASE,
+)
+
+# prípona premennej (lower) -> modul platformy, ktorý z nej robí entity
+_SUFFIX_PLATFORM: dict[str, str] = {
+    f"{DISP.lower()}_value": "sensor",
+    f"{CONTACT_BASE.lower()}_state": "binary_sensor",
+    f"{SOCKET_BASE.lower()}_onoff": "switch",
+    f"{RELAY_BASE.lower()}_onoff": "switch",
+    f"{LIGHT_BASE.lower()}_onoff": "light",
+    f"{COVER_BASE.lower()}_current": "cover",
+    f"{THERMOSTAT_BASE.lower()}_type": "climate",
+    f"{BUTTON_BASE.lower()}_clickcnt": "event",
+}
+_SUFFIXES = tuple(_SUFFIX_PLATFORM)
+_ALL_KINDS = frozenset(_SUFFIX_PLATFORM.values())
+
+
+def detect_platforms(variables: list[str]) -> set[str]:
+    """
+    Jeden prechod katalógom: ktoré moduly platforiem majú aspoň jeden objekt.
+    Končí hneď, ako sú nájdené všetky druhy.
+    """
+    found: set[str] = set()
+    for var in variables:
+        v = var.lower()
+        if not v.endswith(_SUFFIXES):
+            continue
+        for suffix in _SUFFIXES:
+            if v.endswith(suffix):
+                found.add(_SUFFIX_PLATFORM[suffix])
+                break
+        if len(found) == len(_ALL_KINDS):
+            break
+    return found
@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Callable
+
+from homeassistant.helpers import entity_platform
+
+from .const import DOMAIN, ENTITY_ADD_CHUNK, ENTITY_ADD_DELAY
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_add_entities_staged(hass, entry, async_add_entities, entities: list) -> None:
+    """
+    Pridá entity po blokoch. Prvý blok hneď, zvyšok na pozadí s krátkou pauzou
+    medzi blokmi, aby registrácia tisícok entít nezablokovala HA slučku.
+    """
+    if len(entities) <= ENTITY_ADD_CHUNK:
+        if entities:
+            async_add_entities(entities)
+        return
+
+    async_add_entities(entities[:ENTITY_ADD_CHUNK])
+
+    async def _add_rest() -> None:
+        for i in range(ENTITY_ADD_CHUNK, len(entities), ENTITY_ADD_CHUNK):
+            await asyncio.sleep(ENTITY_ADD_DELAY)
+            async_add_entities(entities[i : i + ENTITY_ADD_CHUNK])
+
+    entry.async_create_background_task(hass, _add_rest(), f"{entry.domain} staged entity add")
+
+
+def async_write_entry_states(hass, entry) -> int:
+    """
+    Jeden prechod všetkými entitami entry (po zmene dostupnosti spojenia).
+    Entity nemajú vlastné listenery – `available` čítajú z príznaku klienta.
+    """
+    count = 0
+    for platform in entity_platform.async_get_platforms(hass, DOMAIN):
+        if platform.config_entry is None or platform.config_entry.entry_id != entry.entry_id:
+            continue
+        for entity in list(platform.entities.values()):
+            if entity.hass is not None:
+                entity.async_write_ha_state()
+                count += 1
+    return count
+
+
+class PLCAvailability:
+    """Mixin (pred HA triedou entity): dostupnosť = spojenie klienta s PLCComS."""
+
+    _client = None
+    _plc_replaying = False
+
+    @property
+    def available(self) -> bool:
+        return self._client is None or self._client.available
+
+    def async_write_ha_state(self) -> None:
+        if not self._plc_replaying:
+            super().async_write_ha_state()
+
+    def _register_value(self, var: str, callback) -> None:
+        """
+        Registrácia DIFF callbacku v async_added_to_hass. Replay poslednej známej
+        hodnoty mení len _attr_* – stav zapíše HA raz, hneď po async_added_to_hass.
+        """
+        self._plc_replaying = True
+        try:
+            self._client.register_value_entity(var, callback, replay=True)
+        finally:
+            self._plc_replaying = False
+
+
+def _is_numeric_like(s: str) -> bool:
+    t = (s or "").strip().replace(",", ".")
+    if not t:
+        return True
+    try:
+        float(t)
+        return True
+    except ValueError:
+        return False
+
+
+class PolledName:
+    """
+    Voliteľné periodické čítanie `_name` premennej. PLC texty cez EN neposiela,
+    takže bez pollingu by sa premenovanie v PLC prejavilo až po reštarte HA.
+    """
+
+    __slots__ = ("_entity", "_client", "_var", "_attached")
+
+    def __init__(self, entity, client, name_var: str | None):
+        self._entity = entity
+        self._client = client
+        self._var = client.resolve_var(name_var) if name_var else None
+        self._attached = False
+
+    def attach(self) -> None:
+        interval = self._client.name_poll_interval
+        if not self._var or interval <= 0:
+            return
+        self._client.register_value_entity(self._var, self._on_value)
+        self._client.register_poll(self._var, interval)
+        self._attached = True
+
+    def detach(self) -> None:
+        if not self._attached:
+            return
+        self._client.unregister_poll(self._var)
+        self._client.unregister_value_entity(self._var, self._on_value)
+        self._attached = False
+
+    def _on_value(self, raw_value: str) -> None:
+        name = (raw_value or "").strip().strip('"').strip()
+        if not name or _is_numeric_like(name) or name == self._entity._attr_name:
+            return
+        self._entity._attr_name = name
+        self._entity.async_write_ha_state()
+
+
+class OptimisticState:
+    """
+    Optimistický stav entity: príkaz sa v UI prejaví hneď, PLC ho potvrdí DIFF-om.
+    Ak potvrdenie nepríde do `timeout` sekúnd, zavolá sa rollback (pôvodný stav).
+    """
+
+    __slots__ = ("_entity", "_timeout", "_timer", "_rollback")
+
+    def __init__(self, entity, timeout: float):
+        self._entity = entity
+        self._timeout = float(timeout or 0)
+        self._timer = None
+        self._rollback: Callable[[], None] | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._timeout > 0
+
+    @property
+    def pending(self) -> bool:
+        return self._rollback is not None
+
+    def begin(self, rollback: Callable[[], None]) -> None:
+        """Zapamätá rollback a spustí časovač. Pri opakovanom príkaze ostáva pôvodný rollback."""
+        if self._timer:
+            self._timer.cancel()
+        if self._rollback is None:
+            self._rollback = rollback
+        self._timer = self._entity.hass.loop.call_later(self._timeout, self._expired)
+
+    def confirm(self) -> None:
+        if self._timer:
+            self._timer.cancel()
+        self._timer = None
+        self._rollback = None
+
+    def cancel(self) -> None:
+        """Okamžitý rollback (napr. SET zlyhal)."""
+        rollback = self._rollback
+        self.confirm()
+        if rollback:
+            rollback()
+
+    def _expired(self) -> None:
+        self._timer = None
+        rollback = self._rollback
+        self._rollback = None
+        if rollback is None:
+            return
+        _LOGGER.warning(
+            "%s: PLC did not confirm command within %s s, reverting optimistic state",
+            self._entity.entity_id,
+            self._timeout,
+        )
+        rollback()
+
+
+class CoalescedWrite:
+    """
+    Zlúčený zápis stavu: viac DIFF-ov z jedného bloku (napr. skupinový SET)
+    sa prejaví jedným async_write_ha_state až po spracovaní celého bloku.
+    """
+
+    __slots__ = ("_entity", "_pending")
+
+    def __init__(self, entity):
+        self._entity = entity
+        self._pending = False
+
+    def schedule(self) -> None:
+        if self._pending or self._entity._plc_replaying:
+            return
+        self._pending = True
+        self._entity.hass.loop.call_soon(self._flush)
+
+    def _flush(self) -> None:
+        self._pending = False
+        self._entity.async_write_ha_state()
+
+
+def parse_debounce(value: str) -> tuple[float, float]:
+    """`stabilita[/min. odstup]` v ms -> (s, s)."""
+    stable, _sep, interval = str(value).partition("/")
+    stable_ms = float(stable.strip() or 0)
+    interval_ms = float(interval.strip() or 0)
+    if stable_ms < 0 or interval_ms < 0:
+        raise ValueError("debounce times must not be negative")
+    return stable_ms / 1000.0, interval_ms / 1000.0
+
+
+class Debouncer:
+    """
+    Potlačenie zákmitov: zmena sa zverejní až keď vydrží `stable` s bez ďalšej
+    zmeny a najviac raz za `min_interval` s – čo príde medzitým, doručí sa
+    na konci okna (trailing edge). Len časovače slučky, žiadne úlohy.
+    """
+
+    __slots__ = (
+        "_entity",
+        "_stable",
+        "_min_interval",
+        "_publish",
+        "_value",
+        "_stable_timer",
+        "_candidate",
+        "_rate_timer",
+        "_trailing",
+        "_last_publish",
+        "suppressed",
+    )
+
+    def __init__(self, entity, stable: float, min_interval: float, value, publish: Callable):
+        self._entity = entity
+        self._stable = float(stable or 0)
+        self._min_interval = float(min_interval or 0)
+        self._publish = publish
+        self._value = value
+        self._stable_timer = None
+        self._candidate = None
+        self._rate_timer = None
+        self._trailing = None
+        self._last_publish = float("-inf")
+        self.suppressed = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._stable > 0 or self._min_interval > 0
+
+    def feed(self, value) -> None:
+        if not self.enabled:
+            self._emit(value)
+            return
+        if self._stable <= 0:
+            self._offer(value)
+            return
+        if self._stable_timer is not None:
+            self._stable_timer.cancel()
+            self._stable_timer = None
+            self.suppressed += 1
+        if value == self._value and self._trailing is None:
+            # návrat na zverejnený stav pred uplynutím stability = zákmit
+            self._candidate = None
+            return
+        self._candidate = value
+        self._stable_timer = self._entity.hass.loop.call_later(self._stable, self._stable_expired)
+
+    def cancel(self) -> None:
+        for timer in (self._stable_timer, self._rate_timer):
+            if timer is not None:
+                timer.cancel()
+        self._stable_timer = self._rate_timer = None
+        self._candidate = self._trailing = None
+
+    def _stable_expired(self) -> None:
+        self._stable_timer = None
+        value, self._candidate = self._candidate, None
+        self._offer(value)
+
+    def _offer(self, value) -> None:
+        if value == self._value:
+            if self._trailing is not None:
+                self._trailing = None
+                self.suppressed += 1
+            return
+        wait = self._last_publish + self._min_interval - self._entity.hass.loop.time()
+        if wait <= 0:
+            self._emit(value)
+            return
+        if self._trailing is not None:
+            self.suppressed += 1
+        self._trailing = value
+        if self._rate_timer is None:
+            self._rate_timer = self._entity.hass.loop.call_later(wait, self._flush_trailing)
+
+    def _flush_trailing(self) -> None:
+        self._rate_timer = None
+        value, self._trailing = self._trailing, None
+        if value is not None and value != self._value:
+            self._emit(value)
+
+    def _emit(self, value) -> None:
+        self._value = value
+        self._last_publish = self._entity.hass.loop.time()
+        self._publish(value)
@@ -4,9 +4,24 @@ import re
 from datetime import datetime
 from homeassistant.core import HomeAssistant
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.components.event import EventEntity
 from homeassistant.components.sensor import SensorEntity, SensorStateClass
-from .const import DOMAIN, BUTTON_BASE
+from .const import (
+    DOMAIN,
+    BUTTON_BASE,
+    CONF_CLICK_WINDOW_MS,
+    DEFAULT_CLICK_WINDOW_MS,
+    BUTTON_MAX_DELTA,
+)
+from .filters import ALLOW_ALL
+from .entity import PLCAvailability, async_add_entities_staged
+from .reflex import counter_modulus
 
+EVENT_SINGLE = "single"
+EVENT_DOUBLE = "double"
+EVENT_TRIPLE = "triple"
+EVENT_LONG_PRESS = "long_press"
+_CLICK_EVENTS = (EVENT_SINGLE, EVENT_DOUBLE, EVENT_TRIPLE)
 
 def _slugify_plc_id(plc_id: str) -> str:
     s = (plc_id or "").strip().lower()
@@ -22,7 +37,7 @@ def _to_int(raw: str) -> int:
         return 0
 
 
-def _build_button_index(client):
+def _build_button_index(client, flt=ALLOW_ALL):
     click_suf = f"{BUTTON_BASE.lower()}_clickcnt"
     press_suf = f"{BUTTON_BASE.lower()}_presscnt"
     name_suf = f"{BUTTON_BASE.lower()}_name"
@@ -48,28 +63,84 @@ def _build_button_index(client):
 
     out = []
     for base, rec in idx.items():
-        if "click" in rec and "press" in rec:
+        if "click" in rec and "press" in rec and flt.allows(base):
             out.append((base, rec))
     out.sort(key=lambda x: x[0].lower())
     return out
 
 
-def get_required_var_names(client) -> list[str]:
+def get_required_var_names(client, flt=ALLOW_ALL) -> list[str]:
     out = []
-    for _base, rec in _build_button_index(client):
+    for _base, rec in _build_button_index(client, flt):
         name_var = rec.get("name") or rec["click"]
         out.extend([name_var, rec["click"], rec["press"]])
     return out
 
 
-async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities):
+class ButtonChannel:
+    """
+    Spoločný odber počítadiel jedného tlačidla (ClickCnt + PressCnt).
+    V klientovi je jeden callback na premennú; zmenu (počet + prírastok)
+    rozdelí počítadlovým senzorom aj event entite.
+    """
+
+    def __init__(self, client, plc_base: str, name: str, rec: dict, click_count: int, press_count: int):
+        self.client = client
+        self.plc_base = plc_base
+        self.name = name
+        self.vars = {"click": rec["click"], "press": rec["press"]}
+        self.counts = {"click": click_count, "press": press_count}
+        self._modulus = {kind: counter_modulus(client.catalog, var) for kind, var in self.vars.items()}
+        self._listeners: dict[str, list] = {"click": [], "press": []}
+        self._registered = False
+
+    def attach(self, kind: str, listener) -> None:
+        self._listeners[kind].append(listener)
+        if not self._registered:
+            self.client.register_value_entity(self.vars["click"], self._on_click)
+            self.client.register_value_entity(self.vars["press"], self._on_press)
+            self._registered = True
+
+    def detach(self, kind: str, listener) -> None:
+        if listener in self._listeners[kind]:
+            self._listeners[kind].remove(listener)
+        if self._registered and not any(self._listeners.values()):
+            self.client.unregister_value_entity(self.vars["click"], self._on_click)
+            self.client.unregister_value_entity(self.vars["press"], self._on_press)
+            self._registered = False
+
+    def _on_click(self, raw_value: str) -> None:
+        self._update("click", raw_value)
+
+    def _on_press(self, raw_value: str) -> None:
+        self._update("press", raw_value)
+
+    def _update(self, kind: str, raw_value: str) -> None:
+        new = _to_int(raw_value)
+        prev = self.counts[kind]
+        if new == prev:
+            return
+        # prírastok modulo rozsah počítadla (pretečenie); veľký skok = reset
+        # počítadla v PLC (reštart), vtedy sa len zosynchronizujeme
+        delta = (new - prev) % self._modulus[kind]
+        if delta > BUTTON_MAX_DELTA:
+            delta = 0
+        self.counts[kind] = new
+        for listener in tuple(self._listeners[kind]):
+            listener(new, delta)
+
+
+def _button_channels(hass: HomeAssistant, entry: ConfigEntry) -> list[ButtonChannel]:
+    """Kanály tlačidiel pre entry – vytvoria sa raz, zdieľa ich sensor aj event platforma."""
     entry_data = hass.data[DOMAIN][entry.entry_id]
-    client = entry_data["client"]
-    entry_id = entry.entry_id
-    entities = []
+    channels = entry_data.get("buttons")
+    if channels is not None:
+        return channels
 
-    buttons = _build_button_index(client)
+    client = entry_data["client"]
+    buttons = _build_button_index(client, entry_data.get("filter", ALLOW_ALL))
     values = entry_data.get("initial_values_event") or []
+    channels = []
     idx = 0
 
     for base, rec in buttons:
@@ -80,86 +151,159 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
         idx += 3
 
         plc_base = base.split(".")[-1] if "." in base else base
-        slug = _slugify_plc_id(plc_base)
-
         name = (name_raw or "").strip()
         if not name:
             name = plc_base
 
-        entities.append(TecomatButtonSensor(
-            hass=hass,
-            name=f"{name} Click",
-            client=client,
-            plc_base=plc_base,
-            counter_var=rec["click"],
-            initial_count=_to_int(click_raw),
-            entry_id=entry_id,
-            suggested_entity_id=f"sensor.{slug}_click",
-            sensor_type="click",
-        ))
-        entities.append(TecomatButtonSensor(
+        channels.append(ButtonChannel(client, plc_base, name, rec, _to_int(click_raw), _to_int(press_raw)))
+
+    entry_data["buttons"] = channels
+    return channels
+
+
+async def async_setup_counter_sensors(hass: HomeAssistant, entry: ConfigEntry, async_add_entities):
+    """Počítadlové senzory tlačidiel (volá sensor.py); predvolene vypnuté."""
+    entry_id = entry.entry_id
+    entities = []
+
+    for ch in _button_channels(hass, entry):
+        slug = _slugify_plc_id(ch.plc_base)
+        for sensor_type, label in (("click", "Click"), ("press", "Press")):
+            entities.append(TecomatButtonSensor(
+                hass=hass,
+                name=f"{ch.name} {label}",
+                channel=ch,
+                entry_id=entry_id,
+                suggested_entity_id=f"sensor.{slug}_{sensor_type}",
+                sensor_type=sensor_type,
+            ))
+
+    await async_add_entities_staged(hass, entry, async_add_entities, entities)
+
+
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities):
+    window = float(entry.options.get(CONF_CLICK_WINDOW_MS, DEFAULT_CLICK_WINDOW_MS)) / 1000.0
+    entities = [
+        TecomatButtonEvent(
             hass=hass,
-            name=f"{name} Press",
-            client=client,
-            plc_base=plc_base,
-            counter_var=rec["press"],
-            initial_count=_to_int(press_raw),
-            entry_id=entry_id,
-            suggested_entity_id=f"sensor.{slug}_press",
-            sensor_type="press",
-        ))
+            channel=ch,
+            entry_id=entry.entry_id,
+            suggested_entity_id=f"event.{_slugify_plc_id(ch.plc_base)}",
+            window=window,
+        )
+        for ch in _button_channels(hass, entry)
+    ]
+    await async_add_entities_staged(hass, entry, async_add_entities, entities)
+
+
+class TecomatButtonEvent(PLCAvailability, EventEntity):
+    """
+    Udalosti tlačidla priamo z DIFF-u počítadiel. Kliky v okne `window`
+    sa spočítajú (single/double/triple); každé zvýšenie PressCnt = long_press.
+    Okno 0 = každý klik hneď ako single (najnižšia latencia).
+    """
+
+    _attr_should_poll = False
+    _attr_event_types = [EVENT_SINGLE, EVENT_DOUBLE, EVENT_TRIPLE, EVENT_LONG_PRESS]
+
+    def __init__(self, hass: HomeAssistant, channel: ButtonChannel, entry_id: str, suggested_entity_id: str, window: float):
+        self.hass = hass
+        self._channel = channel
+        self._client = channel.client
+        self._window = window
+        self._clicks = 0
+        self._timer = None
 
-    if entities:
-        async_add_entities(entities)
+        self._attr_name = channel.name
+        self._attr_unique_id = f"{DOMAIN}:{entry_id}:{channel.plc_base}_event"
+        self.entity_id = suggested_entity_id
+        self._attr_device_info = {"identifiers": {(DOMAIN, entry_id)}}
+
+    async def async_added_to_hass(self) -> None:
+        self._channel.attach("click", self._on_click)
+        self._channel.attach("press", self._on_press)
+
+    async def async_will_remove_from_hass(self) -> None:
+        self._channel.detach("click", self._on_click)
+        self._channel.detach("press", self._on_press)
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
 
+    def _on_click(self, _count: int, delta: int) -> None:
+        if delta <= 0:
+            return
+        self._clicks += delta
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        if self._window <= 0:
+            self._flush_clicks()
+        else:
+            self._timer = self.hass.loop.call_later(self._window, self._flush_clicks)
 
-class TecomatButtonSensor(SensorEntity):
+    def _on_press(self, _count: int, delta: int) -> None:
+        if delta <= 0:
+            return
+        # dlhé stlačenie ukončí rozpracovanú sériu klikov
+        if self._timer:
+            self._timer.cancel()
+            self._flush_clicks()
+        self._fire(EVENT_LONG_PRESS, {"presses": delta})
+
+    def _flush_clicks(self) -> None:
+        self._timer = None
+        clicks, self._clicks = self._clicks, 0
+        if clicks <= 0:
+            return
+        self._fire(_CLICK_EVENTS[min(clicks, len(_CLICK_EVENTS)) - 1], {"clicks": clicks})
+
+    def _fire(self, event_type: str, attributes: dict) -> None:
+        self._trigger_event(event_type, {"plc_base": self._channel.plc_base, **attributes})
+        self.async_write_ha_state()
+
+
+class TecomatButtonSensor(PLCAvailability, SensorEntity):
     _attr_should_poll = False
     _attr_state_class = SensorStateClass.TOTAL
+    # udalosti idú cez event entitu; počítadlá len na požiadanie (recorder)
+    _attr_entity_registry_enabled_default = False
 
     def __init__(
         self,
         hass: HomeAssistant,
         name: str,
-        client,
-        plc_base: str,
-        counter_var: str,
-        initial_count: int,
+        channel: ButtonChannel,
         entry_id: str,
         suggested_entity_id: str,
         sensor_type: str,
     ):
         self.hass = hass
         self._attr_name = name
-        self._client = client
-        self._plc_base = plc_base
-        self._counter_var = counter_var
+        self._channel = channel
+        self._client = channel.client
+        self._plc_base = channel.plc_base
         self._sensor_type = sensor_type
 
-        self._attr_unique_id = f"{DOMAIN}:{entry_id}:{plc_base}_{sensor_type}"  # ponechané
+        self._attr_unique_id = f"{DOMAIN}:{entry_id}:{channel.plc_base}_{sensor_type}"  # ponechané
         self.entity_id = suggested_entity_id
         self._attr_device_info = {"identifiers": {(DOMAIN, entry_id)}}
 
-        self._prev_count = int(initial_count or 0)
-        self._attr_native_value = int(initial_count or 0)
+        self._attr_native_value = channel.counts[sensor_type]
         self._last_change_time = None
 
-        self._client.register_value_entity(self._counter_var, self._on_count_change)
+    async def async_added_to_hass(self) -> None:
+        self._attr_native_value = self._channel.counts[self._sensor_type]
+        self._channel.attach(self._sensor_type, self._on_count_change)
 
     async def async_will_remove_from_hass(self) -> None:
-        self._client.unregister_value_entity(self._counter_var)
-
-    def _on_count_change(self, raw_value: str) -> None:
-        try:
-            new_count = _to_int(raw_value)
-            if new_count != self._prev_count:
-                self._attr_native_value = new_count
-                if new_count > self._prev_count:
-                    self._last_change_time = datetime.now()
-                self._prev_count = new_count
-                self.async_write_ha_state()
-        except Exception:
-            pass
+        self._channel.detach(self._sensor_type, self._on_count_change)
+
+    def _on_count_change(self, count: int, delta: int) -> None:
+        self._attr_native_value = count
+        if delta > 0:
+            self._last_change_time = datetime.now()
+        self.async_write_ha_state()
 
     @property
     def extra_state_attributes(self):
@@ -170,4 +314,4 @@ class TecomatButtonSensor(SensorEntity):
         }
         if self._last_change_time:
             attrs["last_change"] = self._last_change_time.isoformat()
-        return attrs
\ No newline at end of file
+        return attrs
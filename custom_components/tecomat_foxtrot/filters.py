@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import fnmatch
+import re
+
+from .const import CONF_INCLUDE, CONF_EXCLUDE
+
+
+def split_patterns(raw) -> list[str]:
+    """
+    Vzory z options flow: oddelené novým riadkom alebo čiarkou.
+    Riadok s regexom ("re:...") sa čiarkami nedelí.
+    """
+    if not raw:
+        return []
+    lines = raw if isinstance(raw, (list, tuple)) else str(raw).splitlines()
+    out: list[str] = []
+    for line in lines:
+        line = (line or "").strip()
+        if line.startswith("re:"):
+            out.append(line)
+        else:
+            out.extend(p.strip() for p in line.split(",") if p.strip())
+    return out
+
+
+def _pattern_to_regex(pattern: str) -> str:
+    # "re:..." = regulárny výraz (hľadá sa kdekoľvek), inak glob (*, ?, [..]) na celú cestu
+    if pattern.startswith("re:"):
+        return f"(?:.*?(?:{pattern[3:]}))"
+    return f"(?:{fnmatch.translate(pattern)})"
+
+
+def compile_patterns(patterns: list[str]) -> re.Pattern | None:
+    """Všetky vzory spojí do jedného regexu (bez ohľadu na veľkosť písmen)."""
+    if not patterns:
+        return None
+    return re.compile("|".join(_pattern_to_regex(p) for p in patterns), re.IGNORECASE)
+
+
+class BasePathFilter:
+    """
+    Filter objektov podľa PLC base path (napr. `MAIN.KUCHYNA_GTSAP1_LIGHT1`).
+    Prázdny include = všetko povolené; exclude má prednosť.
+    """
+
+    __slots__ = ("_include", "_exclude")
+
+    def __init__(self, include: list[str] | None = None, exclude: list[str] | None = None):
+        self._include = compile_patterns(include or [])
+        self._exclude = compile_patterns(exclude or [])
+
+    @classmethod
+    def from_options(cls, options) -> "BasePathFilter":
+        return cls(split_patterns(options.get(CONF_INCLUDE)), split_patterns(options.get(CONF_EXCLUDE)))
+
+    @property
+    def active(self) -> bool:
+        return self._include is not None or self._exclude is not None
+
+    def allows(self, base_path: str) -> bool:
+        if self._include is not None and not self._include.match(base_path):
+            return False
+        if self._exclude is not None and self._exclude.match(base_path):
+            return False
+        return True
+
+
+ALLOW_ALL = BasePathFilter()
+
+
+def parse_overrides(raw) -> list[tuple[re.Pattern, str]]:
+    """
+    Výnimky pre jednotlivé objekty: riadky `vzor = hodnota` (vzor ako pri
+    include/exclude). Prvý zhodný riadok vyhráva. Chyby -> ValueError / re.error.
+    """
+    out: list[tuple[re.Pattern, str]] = []
+    lines = raw if isinstance(raw, (list, tuple)) else str(raw or "").splitlines()
+    for line in lines:
+        line = (line or "").strip()
+        if not line or line.startswith("#"):
+            continue
+        pattern, sep, value = line.rpartition("=")
+        if not sep or not pattern.strip():
+            raise ValueError(f"expected 'pattern = value', got {line!r}")
+        out.append((compile_patterns([pattern.strip()]), value.strip()))
+    return out
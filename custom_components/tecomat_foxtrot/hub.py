@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from .const import HUBS_KEY
+from .plccoms import PLCComSClient
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class _Hub:
+    """Jeden PLCComS endpoint: zdieľaný klient, počet entry a zámok pre setup."""
+
+    __slots__ = ("client", "refs", "lock")
+
+    def __init__(self, client: PLCComSClient):
+        self.client = client
+        self.refs = 0
+        self.lock = asyncio.Lock()
+
+
+def _hubs(hass) -> dict[tuple[str, int], _Hub]:
+    return hass.data.setdefault(HUBS_KEY, {})
+
+
+def _endpoint(host: str, port: int) -> tuple[str, int]:
+    return host.strip().lower(), int(port)
+
+
+def acquire_client(hass, host: str, port: int) -> PLCComSClient:
+    """
+    Klient pre host:port – existujúci sa zdieľa (jedno spojenie, katalóg,
+    cache a EN:* pre všetky entry). Každé volanie treba vrátiť cez
+    async_release_client.
+    """
+    hubs = _hubs(hass)
+    key = _endpoint(host, port)
+    hub = hubs.get(key)
+    if hub is None:
+        hub = hubs[key] = _Hub(PLCComSClient(hass, host, int(port)))
+    hub.refs += 1
+    if hub.refs > 1:
+        _LOGGER.debug("Sharing PLCComS connection %s:%s (%d entries)", host, port, hub.refs)
+    return hub.client
+
+
+def setup_lock(hass, client: PLCComSClient) -> asyncio.Lock:
+    """Setup entry na jednom klientovi beží postupne (connect + priame GET-y pred štartom čítača)."""
+    return _hubs(hass)[_endpoint(client.host, client.port)].lock
+
+
+def client_refs(hass, client: PLCComSClient) -> int:
+    hub = _hubs(hass).get(_endpoint(client.host, client.port))
+    return hub.refs if hub is not None and hub.client is client else 0
+
+
+async def async_release_client(hass, client: PLCComSClient) -> None:
+    """Posledné uvoľnenie zavrie spojenie."""
+    hubs = _hubs(hass)
+    key = _endpoint(client.host, client.port)
+    hub = hubs.get(key)
+    if hub is None or hub.client is not client:
+        await client.async_disconnect()
+        return
+    hub.refs -= 1
+    if hub.refs > 0:
+        return
+    del hubs[key]
+    await client.async_disconnect()
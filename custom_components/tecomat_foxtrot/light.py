@@ -11,7 +11,9 @@ from homeassistant.components.light import (
     ATTR_COLOR_TEMP_KELVIN,
 )
 
-from .const import DOMAIN, LIGHT_BASE
+from .const import DOMAIN, LIGHT_BASE, CONF_OPTIMISTIC, CONF_OPTIMISTIC_TIMEOUT, DEFAULT_OPTIMISTIC_TIMEOUT
+from .entity import OptimisticState, PLCAvailability, PolledName, async_add_entities_staged
+from .filters import ALLOW_ALL
 
 
 def _to_float(raw: str, default: float = 0.0) -> float:
@@ -64,7 +66,7 @@ def _fallback_name(base: str, plc_base: str) -> str:
     return f"Svetlo {num}".strip() if num else "Svetlo"
 
 
-def _discover(client):
+def _discover(client, flt=ALLOW_ALL):
     idx: dict[str, dict[str, str]] = {}
 
     def ensure(base: str) -> dict[str, str]:
@@ -98,6 +100,8 @@ def _discover(client):
             continue
 
         base = rec["base"]
+        if not flt.allows(base):
+            continue
         plc_base = base.rsplit("_LIGHT", 1)[0] if "_LIGHT" in base.upper() else base
 
         out.append(
@@ -116,9 +120,9 @@ def _discover(client):
     return out
 
 
-def get_required_var_names(client) -> list[str]:
+def get_required_var_names(client, flt=ALLOW_ALL) -> list[str]:
     out: list[str] = []
-    for d in _discover(client):
+    for d in _discover(client, flt):
         base = d["base"]
         out.extend(
             [
@@ -141,8 +145,13 @@ async def async_setup_entry(hass, entry, async_add_entities):
     client = entry_data["client"]
     entry_id = entry.entry_id
 
-    lights = _discover(client)
+    lights = _discover(client, entry_data.get("filter", ALLOW_ALL))
     values = entry_data.get("initial_values_light") or []
+    optimistic_timeout = (
+        entry.options.get(CONF_OPTIMISTIC_TIMEOUT, DEFAULT_OPTIMISTIC_TIMEOUT)
+        if entry.options.get(CONF_OPTIMISTIC, False)
+        else 0
+    )
 
     entities = []
     i = 0
@@ -201,13 +210,14 @@ async def async_setup_entry(hass, entry, async_add_entities):
                 rgb_var=d.get("rgb"),
                 temp_var=d.get("colortemp"),
                 entry_id=entry_id,
+                optimistic_timeout=optimistic_timeout,
             )
         )
 
-    async_add_entities(entities)
+    await async_add_entities_staged(hass, entry, async_add_entities, entities)
 
 
-class TecomatLight(LightEntity):
+class TecomatLight(PLCAvailability, LightEntity):
     _attr_should_poll = False
 
     def __init__(
@@ -228,6 +238,7 @@ class TecomatLight(LightEntity):
         rgb_var: str | None,
         temp_var: str | None,
         entry_id: str,
+        optimistic_timeout: float = 0,
     ):
         self._attr_name = name
         self._client = client
@@ -248,6 +259,8 @@ class TecomatLight(LightEntity):
         self._attr_min_color_temp_kelvin = min_temp
         self._attr_max_color_temp_kelvin = max_temp
 
+        self._optimistic = OptimisticState(self, optimistic_timeout)
+        self._polled_name = PolledName(self, client, f"{base}_name")
         self._is_closing = False
         self._last_brightness = initial_brightness if initial_brightness and initial_brightness > 0 else 255
 
@@ -274,30 +287,37 @@ class TecomatLight(LightEntity):
         if initial_brightness is not None:
             self._attr_brightness = initial_brightness
 
-        self._client.register_value_entity(self._state_var, self._on_diff_state)
-        if is_dimmable:
-            self._client.register_value_entity(self._dimlevel_var, self._on_diff_dim)
-            if dimtype == 1:
-                self._client.register_value_entity(self._rgb_var, self._on_diff_rgb)
-            elif dimtype == 2:
-                self._client.register_value_entity(self._temp_var, self._on_diff_temp)
+    async def async_added_to_hass(self) -> None:
+        # až teraz (entita má hass); zmeškané DIFF-y doručí replay
+        self._register_value(self._state_var, self._on_diff_state)
+        if self._is_dimmable:
+            self._register_value(self._dimlevel_var, self._on_diff_dim)
+            if self._dimtype == 1:
+                self._register_value(self._rgb_var, self._on_diff_rgb)
+            elif self._dimtype == 2:
+                self._register_value(self._temp_var, self._on_diff_temp)
+        self._polled_name.attach()
 
     async def async_will_remove_from_hass(self) -> None:
-        self._client.unregister_value_entity(self._state_var)
+        self._polled_name.detach()
+        self._optimistic.confirm()
+        self._client.unregister_value_entity(self._state_var, self._on_diff_state)
         if self._is_dimmable:
-            self._client.unregister_value_entity(self._dimlevel_var)
+            self._client.unregister_value_entity(self._dimlevel_var, self._on_diff_dim)
             if self._dimtype == 1:
-                self._client.unregister_value_entity(self._rgb_var)
+                self._client.unregister_value_entity(self._rgb_var, self._on_diff_rgb)
             elif self._dimtype == 2:
-                self._client.unregister_value_entity(self._temp_var)
+                self._client.unregister_value_entity(self._temp_var, self._on_diff_temp)
 
     def _on_diff_state(self, value: str) -> None:
+        self._optimistic.confirm()
         new_state = _is_truthy(value)
         self._is_closing = not new_state
         self._attr_is_on = new_state
         self.async_write_ha_state()
 
     def _on_diff_dim(self, value: str) -> None:
+        self._optimistic.confirm()
         dim_pct = _to_float(value, 0.0)
         brightness = int((dim_pct / 100.0) * 255)
 
@@ -331,7 +351,34 @@ class TecomatLight(LightEntity):
             return
         self.async_write_ha_state()
 
+    def _optimistic_begin(self, is_on: bool, brightness: int | None = None) -> None:
+        if not self._optimistic.enabled:
+            return
+        if self._attr_is_on == is_on and (brightness is None or brightness == self._attr_brightness):
+            return
+
+        prev_on = self._attr_is_on
+        prev_brightness = self._attr_brightness
+
+        def rollback() -> None:
+            self._attr_is_on = prev_on
+            self._attr_brightness = prev_brightness
+            self.async_write_ha_state()
+
+        self._optimistic.begin(rollback)
+        self._attr_is_on = is_on
+        if is_on and self._is_dimmable:
+            self._attr_brightness = brightness if brightness is not None else (self._attr_brightness or self._last_brightness)
+        self.async_write_ha_state()
+
     async def async_turn_on(self, **kwargs: Any) -> None:
+        try:
+            await self._async_turn_on(**kwargs)
+        except Exception:
+            self._optimistic.cancel()
+            raise
+
+    async def _async_turn_on(self, **kwargs: Any) -> None:
         self._is_closing = False
 
         if ATTR_BRIGHTNESS in kwargs:
@@ -340,12 +387,16 @@ class TecomatLight(LightEntity):
 
             if brightness <= 0:
                 self._is_closing = True
+                self._optimistic_begin(False)
                 await self._client.async_set(self._state_var, "0")
                 return
 
+            self._optimistic_begin(True, brightness)
             self._last_brightness = brightness
             target_v = self._tgtlevel_var if self._dimtype == 0 else self._dimlevel_var
             await self._client.async_set(target_v, f"{dim_pct:.1f}")
+        else:
+            self._optimistic_begin(True)
 
         if ATTR_COLOR_TEMP_KELVIN in kwargs:
             await self._client.async_set(self._temp_var, str(int(kwargs[ATTR_COLOR_TEMP_KELVIN])))
@@ -359,4 +410,9 @@ class TecomatLight(LightEntity):
 
     async def async_turn_off(self, **kwargs: Any) -> None:
         self._is_closing = True
-        await self._client.async_set(self._state_var, "0")
\ No newline at end of file
+        self._optimistic_begin(False)
+        try:
+            await self._client.async_set(self._state_var, "0")
+        except Exception:
+            self._optimistic.cancel()
+            raise
\ No newline at end of file
@@ -1,18 +1,306 @@
 from __future__ import annotations
 
 import asyncio
-from typing import Callable
+import heapq
+import logging
+import random
+import socket
+import time
+import zlib
+from array import array
+from contextlib import asynccontextmanager
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Callable, Mapping
 
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+
+from .catalog import FLAG_STAR, FLAG_TILDE, VariableCatalog
+from .reflex import ReflexBinding, counter_modulus, parse_bindings
 from .const import (
     SUBSCRIBE_WILDCARD,
     RECONNECT_MIN_DELAY,
     RECONNECT_MAX_DELAY,
     ENCODING,
+    TRACE_SIZE,
+    CONF_PROFILE,
+    CONF_PROFILE_THRESHOLD_MS,
+    DEFAULT_PROFILE_THRESHOLD_MS,
+    LATENCY_BUCKETS_MS,
+    SET_CONFIRM_TIMEOUT,
+    CONF_IDLE_TIMEOUT,
+    DEFAULT_IDLE_TIMEOUT,
+    IDLE_PROBE,
+    IDLE_PROBE_TIMEOUT,
+    TCP_KEEPALIVE_IDLE,
+    TCP_KEEPALIVE_INTERVAL,
+    TCP_KEEPALIVE_COUNT,
+    LIST_CHUNK_SIZE,
+    LIST_EXECUTOR_BYTES,
+    LIST_EXECUTOR_VARS,
+    CONF_SWEEP_INTERVAL,
+    DEFAULT_SWEEP_INTERVAL,
+    SWEEP_BATCH,
+    CONF_NAME_POLL_INTERVAL,
+    POLL_TICK,
+    POLL_JITTER,
+    POLL_MAX_BATCH,
+    CONF_WRITE_RATE,
+    DEFAULT_WRITE_RATE,
+    CONF_WRITE_VAR_RATE,
+    DEFAULT_WRITE_VAR_RATE,
+    CONF_WRITE_POLICY,
+    WRITE_POLICY_MERGE,
+    WRITE_POLICY_REJECT,
+    WRITE_QUEUE_DEPTH,
+    CONF_REQUEST_TIMEOUT,
+    DEFAULT_REQUEST_TIMEOUT,
+    CONNECT_TIMEOUT,
+    LIST_IDLE_TIMEOUT,
+    CLOSE_TIMEOUT,
+    RESTART_SETTLE_DELAY,
+    RESTART_LIST_ATTEMPTS,
+    CONF_REFLEX,
+    CONF_CONNECTIONS,
+    DEFAULT_CONNECTIONS,
+    MAX_CONNECTIONS,
+    CONF_JOURNAL_TTL,
+    DEFAULT_JOURNAL_TTL,
+    JOURNAL_DEPTH,
+    SIGNAL_CONNECTION,
 )
 
+_LOGGER = logging.getLogger(__name__)
+
+
+class PLCComSRateLimited(Exception):
+    """SET odmietnutý obmedzovačom zápisov (plná fronta alebo politika reject)."""
+
+
+class PLCComSTimeout(TimeoutError):
+    """Požiadavka na PLCComS nestihla termín (TimeoutError je aj OSError)."""
+
+
 ValueCallback = Callable[[str], None]
 RestartCallback = Callable[[], None]
 
+TRACE_RX = 0
+TRACE_TX = 1
+
+# druh čakajúceho GET-u (ako _run() naloží s odpoveďou)
+GET_PLAIN = 0
+GET_SWEEP = 1
+GET_POLL = 2
+
+
+class ProtocolTrace:
+    """
+    Kruhový buffer posledných N riadkov protokolu (smer + čas).
+    Všetko je predalokované v konštruktore, zápis len prepisuje sloty.
+    """
+
+    __slots__ = ("_size", "_lines", "_times", "_dirs", "_pos", "_count")
+
+    def __init__(self, size: int = TRACE_SIZE):
+        self._size = max(1, int(size))
+        self._lines: list[str | None] = [None] * self._size
+        self._times = array("d", bytes(8 * self._size))
+        self._dirs = bytearray(self._size)
+        self._pos = 0
+        self._count = 0
+
+    def record(self, direction: int, line: str) -> None:
+        pos = self._pos
+        self._lines[pos] = line
+        self._times[pos] = time.time()
+        self._dirs[pos] = direction
+        pos += 1
+        self._pos = 0 if pos == self._size else pos
+        if self._count < self._size:
+            self._count += 1
+
+    def clear(self) -> None:
+        for i in range(self._size):
+            self._lines[i] = None
+        self._pos = 0
+        self._count = 0
+
+    def dump(self) -> list[dict]:
+        """Vráti záznamy od najstaršieho po najnovší."""
+        out: list[dict] = []
+        start = (self._pos - self._count) % self._size
+        for n in range(self._count):
+            i = (start + n) % self._size
+            out.append(
+                {
+                    "time": datetime.fromtimestamp(self._times[i], timezone.utc).isoformat(),
+                    "dir": "tx" if self._dirs[i] == TRACE_TX else "rx",
+                    "line": self._lines[i],
+                }
+            )
+        return out
+
+
+class LatencyHistogram:
+    """Histogram latencií SET -> potvrdzujúci DIFF (pevné hranice v ms)."""
+
+    __slots__ = ("_counts", "count", "total", "max", "unconfirmed")
+
+    def __init__(self):
+        # posledný bucket = nad najvyššou hranicou
+        self._counts = array("L", bytes(array("L").itemsize * (len(LATENCY_BUCKETS_MS) + 1)))
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.unconfirmed = 0
+
+    def add(self, seconds: float) -> None:
+        ms = seconds * 1000.0
+        i = 0
+        for edge in LATENCY_BUCKETS_MS:
+            if ms <= edge:
+                break
+            i += 1
+        self._counts[i] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def as_dict(self) -> dict:
+        labels = [f"<={edge}ms" for edge in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        return {
+            "count": self.count,
+            "unconfirmed": self.unconfirmed,
+            "mean_ms": round(self.total / self.count * 1000.0, 1) if self.count else None,
+            "max_ms": round(self.max * 1000.0, 1),
+            "buckets": dict(zip(labels, self._counts)),
+        }
+
+
+class TokenBucket:
+    """Token bucket: `rate` tokenov za sekundu, najviac `burst` naraz."""
+
+    __slots__ = ("rate", "burst", "tokens", "stamp")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self.stamp = time.monotonic()
+
+    def refill(self, now: float) -> float:
+        if now > self.stamp:
+            self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+            self.stamp = now
+        return self.tokens
+
+    def wait_time(self, now: float) -> float:
+        """Koľko sekúnd do ďalšieho celého tokenu (0 = hneď)."""
+        missing = 1.0 - self.refill(now)
+        return 0.0 if missing <= 0 else missing / self.rate
+
+
+def _unquote(v: str) -> str:
+    v = v.strip()
+    if len(v) >= 2 and v[0] == '"' and v[-1] == '"':
+        return v[1:-1]
+    return v
+
+
+def _same_value(a: str | None, b: str) -> bool:
+    if a is None:
+        return False
+    a = _unquote(a)
+    b = _unquote(b)
+    if a == b:
+        return True
+    try:
+        return float(a.replace(",", ".")) == float(b.replace(",", "."))
+    except ValueError:
+        return False
+
+
+def _parse_list_block(block: bytes) -> tuple[list[str], list[str], list[int], int]:
+    """
+    Parsuje blok celých riadkov odpovede na LIST:.
+    Vráti (mená, typy, príznaky, offset za ukončovacím riadkom alebo -1 ak LIST ešte pokračuje).
+    Beží aj v executore – nesmie siahať na stav klienta.
+    """
+    names: list[str] = []
+    types: list[str] = []
+    flags: list[int] = []
+    pos = 0
+    size = len(block)
+    while pos < size:
+        nl = block.find(b"\n", pos)
+        end = size if nl < 0 else nl + 1
+        line = block[pos:end].decode(ENCODING, errors="replace").strip()
+        pos = end
+
+        # tolerantné čítanie LIST:
+        if line == "LIST:" or not line.startswith("LIST:"):
+            return names, types, flags, pos
+
+        payload = line[5:].strip()
+        if not payload:
+            return names, types, flags, pos
+
+        parts = payload.split(",", 2)
+        raw = parts[0].strip()
+        var = raw.rstrip("*")
+        flag = FLAG_STAR if len(var) != len(raw) else 0
+        stripped = var.rstrip("~")
+        if len(stripped) != len(var):
+            flag |= FLAG_TILDE
+        var = stripped
+        if var:
+            names.append(var)
+            types.append(parts[1].strip() if len(parts) > 1 else "")
+            flags.append(flag)
+    return names, types, flags, -1
+
+
+def _enable_tcp_keepalive(sock) -> None:
+    """Zapne TCP keepalive s krátkymi intervalmi (kde to OS podporuje)."""
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        if hasattr(socket, "TCP_KEEPIDLE"):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, TCP_KEEPALIVE_IDLE)
+        elif hasattr(socket, "TCP_KEEPALIVE"):  # macOS
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPALIVE, TCP_KEEPALIVE_IDLE)
+        if hasattr(socket, "TCP_KEEPINTVL"):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, TCP_KEEPALIVE_INTERVAL)
+        if hasattr(socket, "TCP_KEEPCNT"):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, TCP_KEEPALIVE_COUNT)
+    except OSError as err:
+        _LOGGER.debug("Cannot enable TCP keepalive: %s", err)
+
+
+def shard_of(var_lower: str, shards: int) -> int:
+    """Stabilné priradenie premennej k spojeniu (crc32 nezávisí od PYTHONHASHSEED)."""
+    if shards <= 1 or var_lower == "__plc_run":
+        return 0  # reštart PLC sa sleduje vždy na hlavnom spojení
+    return zlib.crc32(var_lower.encode(ENCODING, errors="replace")) % shards
+
+
+class _Shard:
+    """Doplnkové spojenie: EN: pre svoju časť premenných, číta len DIFF-y."""
+
+    __slots__ = ("index", "writer", "task", "pending", "last_rx", "probe_sent_at", "connects", "diffs", "resyncs")
+
+    def __init__(self, index: int):
+        self.index = index
+        self.writer = None
+        self.task = None
+        # prvé pripojenie alebo zámerný reconnect – ešte sa nepočíta ako výpadok
+        self.pending = True
+        self.last_rx = 0.0
+        self.probe_sent_at: float | None = None
+        self.connects = 0
+        self.diffs = 0
+        self.resyncs = 0
+
 
 class PLCComSClient:
     def __init__(self, hass, host: str, port: int):
@@ -23,113 +311,738 @@ class PLCComSClient:
         self.reader = None
         self.writer = None
 
-        self.variables: list[str] = []
-        self._var_map: dict[str, str] = {}  # lower(var)->real var from LIST
+        self.catalog = VariableCatalog()
 
-        self._diff_callbacks: dict[str, ValueCallback] = {}
-        self._restart_callback: RestartCallback | None = None
+        # kľúč premennej = id v katalógu, pre premenné mimo LIST-u lower(meno)
+        # jeden callback alebo tuple callbackov (klient môže byť zdieľaný viacerými entry)
+        self._diff_callbacks: dict[int | str, ValueCallback | tuple[ValueCallback, ...]] = {}
+        self._restart_callbacks: list[RestartCallback] = []
 
         self._io_lock = asyncio.Lock()
+        self._request_timeout: float = DEFAULT_REQUEST_TIMEOUT
+        self._timeout_stats = {"get": 0, "set": 0, "write": 0, "list": 0, "escalations": 0}
         self._task = None
         self._stop_event = asyncio.Event()
         self._connected = False
         self._subscribed = False
+        self._available = False  # zdieľaný príznak pre entity; mení sa len v _refresh_available
+        self._main_up = False
+        self.connection_signal = SIGNAL_CONNECTION.format(f"{host.lower()}:{port}")
         self._plc_run_state = None
 
+        # reštart PLC: obnova katalógu beží mimo _run(), DIFF-y sa medzitým držia
+        self._restart_task = None
+        self._held: dict[str, str] | None = None  # lower(meno) -> posledná hodnota
+        self._restart_stats = {"restarts": 0, "failures": 0, "held": 0}
+
+        # sharding odberu: spojenie 0 je hlavné (_run), ostatné sú _Shard
+        self._connections = DEFAULT_CONNECTIONS
+        self._shards: list[_Shard] = []
+
+        self.trace = ProtocolTrace(TRACE_SIZE)
+
+        # voliteľné meranie času callbackov (None = vypnuté)
+        self._profile_threshold: float | None = None
+        self._dispatch_stats: dict[int | str, list] = {}  # key -> [count, total_s, max_s]
+        self._phase_stats: dict[str, float] = {}
+
+        # posledné známe hodnoty (z GET aj DIFF) a čakajúce SET-y na potvrdenie
+        self._values: dict[int | str, str] = {}  # key -> value
+        self._pending_sets: dict[int | str, tuple] = {}  # key -> (t0, platform, value, timer)
+        self._latency: dict[str, LatencyHistogram] = {}
+
+        # watchdog ticha na spojení (polootvorené TCP)
+        self._idle_timeout: float = DEFAULT_IDLE_TIMEOUT
+        self._last_rx = 0.0
+        self._probe_sent_at: float | None = None
+        self._watchdog = None
+        self._idle_reconnects = 0
+
+        # GET-y počas behu _run(): odpovede číta _run() a rozdeľuje ich čakajúcim
+        self._get_waiters: deque = deque()  # [key, future, GET_*]
+
+        # anti-entropy: periodické overovanie stavu cez GET
+        self._sweep_interval: float = DEFAULT_SWEEP_INTERVAL
+        self._sweep_task = None
+        self._sweep_stats = {"cycles": 0, "checked": 0, "corrections": 0}
+
+        # poll fallback pre premenné, ktoré PLC cez EN neposiela
+        self._polls: dict[int | str, list] = {}  # key -> [interval, seq platného záznamu v halde, počet odberateľov]
+        self._poll_heap: list[tuple[float, int, int | str]] = []  # (due, seq, key)
+        self._poll_seq = 0
+        self._poll_wakeup = asyncio.Event()
+        self._poll_task = None
+        self._poll_stats = {"ticks": 0, "polled": 0, "changes": 0}
+        self.name_poll_interval: float = 0.0
+
+        # obmedzovač zápisov (spojenie + jednotlivé premenné)
+        self._write_policy = WRITE_POLICY_MERGE
+        self._write_bucket = TokenBucket(DEFAULT_WRITE_RATE, DEFAULT_WRITE_RATE * 2)
+        self._var_rate = DEFAULT_WRITE_VAR_RATE
+        self._var_buckets: dict[int | str, TokenBucket] = {}
+        self._outbox: dict[int | str, list] = {}  # key -> [real, value, [futures], skupina alebo None]
+        self._outbox_task = None
+        self._write_stats = {"sent": 0, "queued": 0, "merged": 0, "rejected": 0, "max_depth": 0}
+
+        # žurnál SET-ov počas výpadku: key -> [real, value, termín platnosti (monotonic)]
+        self._journal: dict[int | str, list] = {}
+        self._journal_ttl: float = DEFAULT_JOURNAL_TTL
+        self._resynced = False  # True až po reconnecte, EN: a odoslaní žurnálu
+        self._journal_stats = {"journaled": 0, "merged": 0, "replayed": 0, "expired": 0, "dropped": 0, "rejected": 0}
+
+        # voľby entry zdieľajúcich klienta (entry_id -> options, v poradí setupu)
+        self._entry_options: dict[str, Mapping[str, Any]] = {}
+        # premenné, ktoré entry potrebujú (lower); None = všetky -> EN:*
+        self._entry_interest: dict[str, frozenset[str] | None] = {}
+
+        # reflexné väzby: zdrojový kľúč -> väzby (vyhodnocuje _dispatch)
+        self._reflex_bindings: list[ReflexBinding] = []
+        self._reflex: dict[int | str, list[ReflexBinding]] = {}
+        self._reflex_stats = {"fired": 0, "writes": 0, "queued": 0, "skipped": 0}
+
+        # prebytok dát načítaný za koncom LIST-u (patrí ďalším riadkom)
+        self._rx_pending = b""
+        self._list_progress = 0
+
+    def apply_options(self, options: Mapping[str, Any], entry_id: str = "") -> None:
+        """
+        Aplikuje voľby config entry (entry.options) na klienta. Pri zdieľanom
+        klientovi platia voľby spojenia (časovače, limity, žurnál) z prvej
+        entry; reflexné väzby sa zlúčia zo všetkých.
+        """
+        before = self._interest()
+        self._entry_options[entry_id] = options
+        self._apply_entry_options()
+        self._widen_subscription(before)
+
+    def remove_options(self, entry_id: str = "") -> None:
+        """
+        Entry sa odpojila od klienta – jej väzby zmiznú, voľby spojenia prevezme
+        ďalšia. Odber jej premenných sa zúži až pri ďalšom prihlásení.
+        """
+        self._entry_interest.pop(entry_id, None)
+        if self._entry_options.pop(entry_id, None) is not None and self._entry_options:
+            self._apply_entry_options()
+
+    def set_interest(self, entry_id: str, names: list[str] | None) -> None:
+        """
+        Premenné objektov entry (None = všetky). Kým má každá entry filter,
+        odoberá sa len ich zjednotenie (EN: po premenných) namiesto EN:*.
+        """
+        before = self._interest()
+        self._entry_interest[entry_id] = None if names is None else frozenset(n.lower() for n in names)
+        self._widen_subscription(before)
+
+    def _interest(self) -> frozenset[str] | None:
+        if not self._entry_interest or None in self._entry_interest.values():
+            return None
+        out = set().union(*self._entry_interest.values())
+        # reflexy bežia aj pre objekty mimo filtra; __plc_run = detekcia reštartu
+        for binding in self._reflex_bindings:
+            out.add(binding.source.lower())
+            out.update(t.lower() for t in binding.targets)
+        out.add("__plc_run")
+        return frozenset(out)
+
+    def _widen_subscription(self, before: frozenset[str] | None) -> None:
+        """Pribudli premenné mimo doterajšieho odberu -> doplniť EN: za behu."""
+        if not self._subscribed or before is None:
+            return
+        after = self._interest()
+        if after is not None and after <= before:
+            return
+        self.hass.async_create_task(self._async_subscribe_more(None if after is None else after - before))
+
+    async def _async_subscribe_more(self, added: frozenset[str] | None) -> None:
+        """
+        EN: pre nové premenné na hlavnom spojení (None = všetky). Shardy, ktorým
+        premenné pribudli, sa prihlásia znova. GET-y medzitým bežia ďalej.
+        """
+        n = len(self._shards) + 1
+        if added is None:
+            lines = [f"EN:{name}" for name in self._shard_names(0)] if self._shards else [SUBSCRIBE_WILDCARD]
+            self._restart_shards(self._shards)
+        else:
+            names = [name for name in self.catalog.names if name.lower() in added]
+            lines = [f"EN:{name}" for name in names if shard_of(name.lower(), n) == 0]
+            hit = {shard_of(name.lower(), n) for name in names}
+            self._restart_shards([s for s in self._shards if s.index in hit])
+        if not lines:
+            return
+        try:
+            async with self._locked():
+                if self.writer is None:
+                    return  # po reconnecte sa prihlási už s novým odberom
+                for line in lines:
+                    self._write(line)
+                await self._drain()
+        except (ConnectionError, OSError) as err:
+            _LOGGER.debug("%s:%s subscription update skipped: %s", self.host, self.port, err)
+
+    def _restart_shards(self, shards: list[_Shard]) -> None:
+        for shard in shards:
+            if shard.writer is not None:
+                shard.pending = True  # zámerné – reconnect hneď, bez výpadku dostupnosti
+                shard.writer.transport.abort()
+
+    def _apply_entry_options(self) -> None:
+        owner, options = next(iter(self._entry_options.items()))
+        if len(self._entry_options) > 1:
+            _LOGGER.debug("%s:%s: connection options taken from entry %s", self.host, self.port, owner)
+
+        if options.get(CONF_PROFILE, False):
+            threshold_ms = options.get(CONF_PROFILE_THRESHOLD_MS, DEFAULT_PROFILE_THRESHOLD_MS)
+            self._profile_threshold = float(threshold_ms) / 1000.0
+        else:
+            self._profile_threshold = None
+
+        self._idle_timeout = float(options.get(CONF_IDLE_TIMEOUT, DEFAULT_IDLE_TIMEOUT))
+        self._request_timeout = float(options.get(CONF_REQUEST_TIMEOUT, DEFAULT_REQUEST_TIMEOUT))
+        self._sweep_interval = float(options.get(CONF_SWEEP_INTERVAL, DEFAULT_SWEEP_INTERVAL))
+        self.name_poll_interval = float(options.get(CONF_NAME_POLL_INTERVAL, 0) or 0)
+        # počet spojení sa prejaví pri ďalšom start()
+        self._connections = max(1, min(MAX_CONNECTIONS, int(options.get(CONF_CONNECTIONS, DEFAULT_CONNECTIONS))))
+
+        # buckety sa menia len pri zmene limitu (inak by setup ďalšej entry vynuloval stav)
+        rate = float(options.get(CONF_WRITE_RATE, DEFAULT_WRITE_RATE))
+        if rate != self._write_bucket.rate:
+            self._write_bucket = TokenBucket(rate, rate * 2)
+        var_rate = float(options.get(CONF_WRITE_VAR_RATE, DEFAULT_WRITE_VAR_RATE))
+        if var_rate != self._var_rate:
+            self._var_rate = var_rate
+            self._var_buckets.clear()
+        self._write_policy = options.get(CONF_WRITE_POLICY, WRITE_POLICY_MERGE)
+        self._journal_ttl = float(options.get(CONF_JOURNAL_TTL, DEFAULT_JOURNAL_TTL))
+
+        bindings: list[ReflexBinding] = []
+        for entry_id, entry_options in self._entry_options.items():
+            try:
+                bindings.extend(parse_bindings(entry_options.get(CONF_REFLEX)))
+            except ValueError as err:
+                _LOGGER.error("Invalid reflex bindings (entry %s), ignoring them: %s", entry_id, err)
+        self._reflex_bindings = bindings
+        self._compile_reflex()
+
+    def _compile_reflex(self) -> None:
+        """Tabuľka väzieb podľa kľúča zdroja (po zmene katalógu sa postaví znova)."""
+        table: dict[int | str, list[ReflexBinding]] = {}
+        for binding in self._reflex_bindings:
+            binding.modulus = counter_modulus(self.catalog, binding.source)
+            table.setdefault(self._key(binding.source), []).append(binding)
+        self._reflex = table
+
+    @property
+    def variables(self) -> list[str]:
+        return self.catalog.names
+
+    @property
+    def connected(self) -> bool:
+        return self._connected
+
+    @property
+    def available(self) -> bool:
+        return self._available
+
+    def _set_available(self, main_up: bool) -> None:
+        self._main_up = main_up
+        self._refresh_available()
+
+    def _refresh_available(self) -> None:
+        """
+        Dostupné = hlavné spojenie aj všetky shardy (výpadok shardu = časť dát je stará).
+        Jeden dispatcher broadcast na prechod (nie na každý pokus o reconnect).
+        """
+        available = self._main_up and all(s.writer is not None or s.pending for s in self._shards)
+        if available == self._available:
+            return
+        self._available = available
+        if available:
+            _LOGGER.info("%s:%s: connection restored", self.host, self.port)
+        else:
+            _LOGGER.warning("%s:%s: connection lost, entities unavailable", self.host, self.port)
+        async_dispatcher_send(self.hass, self.connection_signal, available)
+
     def resolve_var(self, var_name: str) -> str:
         """Return real variable name (case as reported by LIST)."""
         if not var_name:
             return var_name
-        return self._var_map.get(var_name.lower(), var_name)
+        return self.catalog.resolve(var_name)
+
+    def _key(self, var_name: str) -> int | str:
+        key = var_name.lower()
+        vid = self.catalog.id_of_lower(key)
+        return key if vid < 0 else vid
+
+    def _key_name(self, key: int | str) -> str:
+        return self.catalog.names[key] if isinstance(key, int) else key
+
+    def _set_catalog(self, catalog: VariableCatalog) -> None:
+        """Vymení katalóg; id sa môžu zmeniť, preto preklíčujeme všetky mapy."""
+        old = self.catalog
+        self.catalog = catalog
+
+        def rekey(mapping: dict) -> dict:
+            out = {}
+            for key, val in mapping.items():
+                name = old.names[key] if isinstance(key, int) else key
+                out[self._key(name)] = val
+            return out
+
+        self._diff_callbacks = rekey(self._diff_callbacks)
+        self._values = rekey(self._values)
+        self._pending_sets = rekey(self._pending_sets)
+        self._dispatch_stats = rekey(self._dispatch_stats)
+        self._var_buckets = rekey(self._var_buckets)
+        self._outbox = rekey(self._outbox)
+        self._journal = rekey(self._journal)
+        self._compile_reflex()
+
+        self._polls = rekey(self._polls)
+        self._poll_heap.clear()
+        now = time.monotonic()
+        for key, poll in self._polls.items():
+            self._schedule_poll(key, now + random.uniform(0, poll[0]))
+        self._poll_wakeup.set()
+
+        if self._shards or self._interest() is not None:
+            # nové premenné -> nové priradenie / EN: po menách; všetky spojenia sa prihlásia znova
+            self._subscribed = False
+            self._restart_shards(self._shards)
 
     async def async_connect(self, list_only: bool = False) -> None:
         """
         list_only=True používame v Config Flow len na test konektivity.
         Tam NESMIEME čítať celý LIST (pri veľkých projektoch to často prekročí timeout).
         """
-        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            self.reader, self.writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), CONNECT_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            raise PLCComSTimeout(f"Connect to {self.host}:{self.port} timed out") from None
         self._connected = True
         self._subscribed = False
+        self._last_rx = self.hass.loop.time()
+        self._probe_sent_at = None
+        self._rx_pending = b""
+
+        sock = self.writer.get_extra_info("socket")
+        if sock is not None:
+            _enable_tcp_keepalive(sock)
 
         if list_only:
             # lacný „ping“: GET na __plc_run (má to aj tvoj runtime hook)
             await self._send("GET:__plc_run")
             # ak PLCComS odpovie hocijako, konektivita je OK
-            await self._read_line()
+            await self._read_line_timeout(self._request_timeout)
             return
 
         await self._send("LIST:")
         await self._read_list()
+        self._set_available(True)
 
     async def async_disconnect(self) -> None:
         self.stop()
         if self._task:
+            # _run() môže visieť v čítaní -> zrušíme ho
+            self._task.cancel()
             try:
                 await self._task
-            except Exception:
+            except BaseException:
                 pass
+        if self._outbox_task:
+            self._outbox_task.cancel()
+            self._outbox_task = None
+        self._fail_get_waiters(ConnectionError("PLCComS disconnected"))
 
         if self.writer:
             self.writer.close()
-            await self.writer.wait_closed()
+            try:
+                await asyncio.wait_for(self.writer.wait_closed(), CLOSE_TIMEOUT)
+            except (asyncio.TimeoutError, OSError):
+                self.writer.transport.abort()
 
         self.reader = None
         self.writer = None
         self._connected = False
         self._subscribed = False
+        self._resynced = False
+        self._set_available(False)
+
+        for pending in self._pending_sets.values():
+            pending[3].cancel()
+        self._pending_sets.clear()
+
+        if self._journal:
+            self._report_dropped(list(self._journal.values()), "dropped")
+            self._journal.clear()
 
     def start(self) -> None:
         if self._task and not self._task.done():
             return
         self._stop_event.clear()
         self._task = self.hass.loop.create_task(self._run())
+        self._arm_watchdog()
+        if self._sweep_interval > 0:
+            self._sweep_task = self.hass.loop.create_task(self._sweep_loop())
+        self._poll_task = self.hass.loop.create_task(self._poll_loop())
+        if self._connections > 1:
+            self._shards = [_Shard(i) for i in range(1, self._connections)]
+            for shard in self._shards:
+                shard.task = self.hass.loop.create_task(self._shard_loop(shard))
 
     def stop(self) -> None:
         self._stop_event.set()
+        if self._watchdog:
+            self._watchdog.cancel()
+            self._watchdog = None
+        if self._sweep_task:
+            self._sweep_task.cancel()
+            self._sweep_task = None
+        if self._poll_task:
+            self._poll_task.cancel()
+            self._poll_task = None
+        if self._restart_task:
+            self._restart_task.cancel()
+            self._restart_task = None
+        for shard in self._shards:
+            if shard.task:
+                shard.task.cancel()
+            if shard.writer is not None:
+                shard.writer.transport.abort()
+                shard.writer = None
+        self._shards = []
 
-    def register_value_entity(self, var_name: str, callback: ValueCallback) -> None:
-        real = self.resolve_var(var_name)
-        self._diff_callbacks[real.lower()] = callback
+    def _arm_watchdog(self) -> None:
+        if self._idle_timeout <= 0 or self._stop_event.is_set():
+            return
+        self._watchdog = self.hass.loop.call_later(
+            min(self._idle_timeout, IDLE_PROBE_TIMEOUT) / 2, self._watchdog_tick
+        )
 
-    def unregister_value_entity(self, var_name: str) -> None:
-        real = self.resolve_var(var_name)
-        self._diff_callbacks.pop(real.lower(), None)
+    def _watchdog_tick(self) -> None:
+        """
+        Keď je spojenie dlho ticho, pošle lacnú sondu. Ak ani na ňu nič nepríde,
+        transport zavrieme – readline() v _run() skončí a nasleduje reconnect.
+        """
+        self._watchdog = None
+        now = self.hass.loop.time()
+
+        if self._connected and self.writer is not None:
+            if self._probe_sent_at is not None:
+                if self._last_rx >= self._probe_sent_at:
+                    self._probe_sent_at = None
+                elif now - self._probe_sent_at >= IDLE_PROBE_TIMEOUT:
+                    _LOGGER.warning(
+                        "%s:%s: no data for %.0f s and idle probe unanswered, reconnecting",
+                        self.host,
+                        self.port,
+                        now - self._last_rx,
+                    )
+                    self._probe_sent_at = None
+                    self._idle_reconnects += 1
+                    self.writer.transport.abort()
+            elif now - self._last_rx >= self._idle_timeout:
+                self._probe_sent_at = now
+                try:
+                    self._write(IDLE_PROBE)
+                except Exception:
+                    self.writer.transport.abort()
+
+        for shard in self._shards:
+            self._watch_shard(shard, now)
+
+        self._arm_watchdog()
+
+    def _watch_shard(self, shard: _Shard, now: float) -> None:
+        """Rovnaká sonda ako pre hlavné spojenie; odpoveď GET stačí ako znak života."""
+        if shard.writer is None:
+            return
+        if shard.probe_sent_at is not None:
+            if shard.last_rx >= shard.probe_sent_at:
+                shard.probe_sent_at = None
+            elif now - shard.probe_sent_at >= IDLE_PROBE_TIMEOUT:
+                _LOGGER.warning("%s:%s: connection %d idle probe unanswered, reconnecting", self.host, self.port, shard.index)
+                shard.probe_sent_at = None
+                self._idle_reconnects += 1
+                shard.writer.transport.abort()
+        elif now - shard.last_rx >= self._idle_timeout:
+            shard.probe_sent_at = now
+            try:
+                shard.writer.write((IDLE_PROBE + "\n").encode(ENCODING))
+            except Exception:
+                shard.writer.transport.abort()
+
+    def diagnostics(self) -> dict:
+        return {
+            "host": self.host,
+            "port": self.port,
+            "connected": self._connected,
+            "available": self._available,
+            "subscribed": self._subscribed,
+            "plc_run_state": self._plc_run_state,
+            "variables": len(self.variables),
+            "list_progress": self._list_progress,
+            "subscribers": len(self._diff_callbacks),
+            "profile": self._profile_diagnostics(),
+            "set_latency": {p: h.as_dict() for p, h in self._latency.items()},
+            "pending_sets": len(self._pending_sets),
+            "idle_reconnects": self._idle_reconnects,
+            "sweep": {"interval": self._sweep_interval, **self._sweep_stats},
+            "poll": {"variables": len(self._polls), **self._poll_stats},
+            "reflex": {"bindings": len(self._reflex_bindings), **self._reflex_stats},
+            "subscription": "*" if self._interest() is None else len(self._interest()),
+            "restart": {"in_progress": self._held is not None, **self._restart_stats},
+            "connections": [
+                {
+                    "index": s.index,
+                    "connected": s.writer is not None,
+                    "connects": s.connects,
+                    "diffs": s.diffs,
+                    "resyncs": s.resyncs,
+                }
+                for s in self._shards
+            ],
+            "writes": {
+                "policy": self._write_policy,
+                "rate": self._write_bucket.rate,
+                "var_rate": self._var_rate,
+                "queue_depth": len(self._outbox),
+                **self._write_stats,
+            },
+            "journal": {"ttl": self._journal_ttl, "depth": len(self._journal), **self._journal_stats},
+            "timeouts": {"request_timeout": self._request_timeout, **self._timeout_stats},
+            "trace": self.trace.dump(),
+        }
+
+    def _profile_diagnostics(self) -> dict:
+        if self._profile_threshold is None:
+            return {"enabled": False}
+        top = sorted(self._dispatch_stats.items(), key=lambda kv: kv[1][1], reverse=True)[:50]
+        return {
+            "enabled": True,
+            "threshold_ms": round(self._profile_threshold * 1000.0, 3),
+            "setup_phases_ms": {k: round(v * 1000.0, 3) for k, v in self._phase_stats.items()},
+            "dispatch_top": [
+                {
+                    "var": self._key_name(key),
+                    "count": st[0],
+                    "total_ms": round(st[1] * 1000.0, 3),
+                    "max_ms": round(st[2] * 1000.0, 3),
+                }
+                for key, st in top
+            ],
+        }
+
+    def record_phase(self, phase: str, seconds: float) -> None:
+        """Zaznamená trvanie fázy setupu (len pri zapnutom profilovaní)."""
+        if self._profile_threshold is None:
+            return
+        self._phase_stats[phase] = seconds
+        if seconds >= self._profile_threshold:
+            _LOGGER.warning("%s:%s setup phase '%s' took %.1f ms", self.host, self.port, phase, seconds * 1000.0)
+
+    def register_value_entity(self, var_name: str, callback: ValueCallback, replay: bool = False) -> None:
+        """
+        replay=True: hneď doručí poslednú známu hodnotu (DIFF-y, ktoré prišli
+        pred registráciou – napr. počas postupného pridávania entít).
+        """
+        key = self._key(self.resolve_var(var_name))
+        cur = self._diff_callbacks.get(key)
+        if cur is None:
+            self._diff_callbacks[key] = callback
+        elif isinstance(cur, tuple):
+            if callback not in cur:
+                self._diff_callbacks[key] = cur + (callback,)
+        elif cur != callback:
+            self._diff_callbacks[key] = (cur, callback)
+        if replay and key in self._values:
+            callback(self._values[key])
+
+    def unregister_value_entity(self, var_name: str, callback: ValueCallback | None = None) -> None:
+        """Odhlási `callback` (bez neho všetky callbacky premennej)."""
+        key = self._key(self.resolve_var(var_name))
+        cur = self._diff_callbacks.get(key)
+        if cur is None:
+            return
+        if callback is None or cur == callback:
+            del self._diff_callbacks[key]
+        elif isinstance(cur, tuple):
+            rest = tuple(cb for cb in cur if cb != callback)
+            self._diff_callbacks[key] = rest[0] if len(rest) == 1 else rest
+
+    def register_poll(self, var_name: str, interval: float) -> None:
+        """
+        Prihlási premennú na periodické čítanie (GET). Výsledok ide cez bežný
+        DIFF dispatch, ak sa hodnota zmenila. Prvé čítanie je náhodne rozložené.
+        """
+        if interval <= 0:
+            return
+        # kratší interval než tick by sa v jednom ticku naplánoval znova a znova
+        interval = max(float(interval), POLL_TICK)
+        key = self._key(self.resolve_var(var_name))
+        poll = self._polls.get(key)
+        if poll is not None:
+            # ďalší odberateľ tej istej premennej: platí kratší interval
+            poll[0] = min(poll[0], interval)
+            poll[2] += 1
+            return
+        self._polls[key] = [interval, 0, 1]
+        self._schedule_poll(key, time.monotonic() + random.uniform(0, interval))
+        self._poll_wakeup.set()
+
+    def unregister_poll(self, var_name: str) -> None:
+        # záznam v halde sa zahodí lenivo pri ďalšom ticku
+        key = self._key(self.resolve_var(var_name))
+        poll = self._polls.get(key)
+        if poll is None:
+            return
+        poll[2] -= 1
+        if poll[2] <= 0:
+            del self._polls[key]
+
+    def _schedule_poll(self, key: int | str, due: float) -> None:
+        self._poll_seq += 1
+        self._polls[key][1] = self._poll_seq
+        heapq.heappush(self._poll_heap, (due, self._poll_seq, key))
 
     def register_restart_callback(self, callback: RestartCallback) -> None:
-        self._restart_callback = callback
+        if callback not in self._restart_callbacks:
+            self._restart_callbacks.append(callback)
+
+    def unregister_restart_callback(self, callback: RestartCallback) -> None:
+        if callback in self._restart_callbacks:
+            self._restart_callbacks.remove(callback)
+
+    def _write(self, msg: str) -> None:
+        self.trace.record(TRACE_TX, msg)
+        self.writer.write((msg + "\n").encode(ENCODING))
+
+    @asynccontextmanager
+    async def _locked(self):
+        """_io_lock s termínom – zaseknutá požiadavka nezablokuje ostatné navždy."""
+        try:
+            await asyncio.wait_for(self._io_lock.acquire(), self._request_timeout)
+        except asyncio.TimeoutError:
+            self._timeout_stats["write"] += 1
+            raise PLCComSTimeout("PLCComS I/O lock busy") from None
+        try:
+            yield
+        finally:
+            self._io_lock.release()
+
+    async def _drain(self) -> None:
+        if self.writer is None:
+            raise ConnectionError("PLCComS not connected")
+        try:
+            await asyncio.wait_for(self.writer.drain(), self._request_timeout)
+        except asyncio.TimeoutError:
+            # PLCComS nečíta -> spojenie je zaseknuté
+            self._timeout_stats["write"] += 1
+            self._escalate("write stalled")
+            raise PLCComSTimeout("PLCComS write timed out") from None
+
+    def _escalate(self, reason: str) -> None:
+        """Zaseknuté spojenie: zahodíme ho, _run() sa znova pripojí."""
+        _LOGGER.warning("%s:%s %s, reconnecting", self.host, self.port, reason)
+        self._timeout_stats["escalations"] += 1
+        self._drop_connection()
 
     async def _send(self, msg: str) -> None:
-        async with self._io_lock:
-            self.writer.write((msg + "\n").encode(ENCODING))
-            await self.writer.drain()
+        async with self._locked():
+            if self.writer is None:
+                raise ConnectionError("PLCComS not connected")
+            self._write(msg)
+            await self._drain()
 
     async def _read_line(self) -> str:
-        line = await self.reader.readline()
+        if self._rx_pending:
+            nl = self._rx_pending.find(b"\n")
+            if nl >= 0:
+                line = self._rx_pending[: nl + 1]
+                self._rx_pending = self._rx_pending[nl + 1 :]
+            else:
+                line = self._rx_pending + await self.reader.readline()
+                self._rx_pending = b""
+        else:
+            line = await self.reader.readline()
         if not line:
             raise ConnectionError("PLCComS connection closed")
-        return line.decode(ENCODING, errors="replace").strip()
+        self._last_rx = self.hass.loop.time()
+        text = line.decode(ENCODING, errors="replace").strip()
+        self.trace.record(TRACE_RX, text)
+        return text
+
+    async def _read_line_timeout(self, timeout: float) -> str:
+        """Čítanie mimo _run() (setup, config flow): bez odpovede do termínu = zaseknuté."""
+        try:
+            return await asyncio.wait_for(self._read_line(), timeout)
+        except asyncio.TimeoutError:
+            self._timeout_stats["get"] += 1
+            self._escalate("no reply")
+            raise PLCComSTimeout("PLCComS reply timed out") from None
 
     async def _read_list(self) -> None:
-        self.variables = []
-        self._var_map = {}
+        """LIST na hlavnom spojení (pred EN:*, takže doň nemiešajú DIFF-y)."""
+        buf = self._rx_pending
+        self._rx_pending = b""
+        catalog, self._rx_pending = await self._fetch_list(self.reader, buf)
+        self._set_catalog(catalog)
+
+    async def _fetch_list(self, reader, buf: bytes) -> tuple[VariableCatalog, bytes]:
+        """
+        LIST čítame po veľkých blokoch, nie po riadkoch. Veľké bloky parsujeme
+        v executore, aby HA slučka nezamrzla. Celkový timeout zámerne nie je –
+        pri obrovských projektoch LIST trvá dlho; stráži sa len nečinnosť
+        (LIST_IDLE_TIMEOUT medzi blokmi). Vráti katalóg a dáta za koncom LIST-u.
+        """
+        names: list[str] = []
+        types: list[str] = []
+        flags: list[int] = []
+        rest = b""
+        self._list_progress = 0
 
-        # tolerantné čítanie LIST:
         while True:
-            line = await self._read_line()
-            if line == "LIST:" or not line.startswith("LIST:"):
-                break
+            if b"\n" not in buf:
+                try:
+                    chunk = await asyncio.wait_for(reader.read(LIST_CHUNK_SIZE), LIST_IDLE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    self._timeout_stats["list"] += 1
+                    raise PLCComSTimeout(f"LIST stalled after {len(names)} variables") from None
+                if not chunk:
+                    raise ConnectionError("PLCComS connection closed during LIST")
+                if reader is self.reader:
+                    self._last_rx = self.hass.loop.time()
+                buf += chunk
+
+            cut = buf.rfind(b"\n")
+            if cut < 0:
+                continue
+            block, buf = buf[: cut + 1], buf[cut + 1 :]
+
+            if len(block) >= LIST_EXECUTOR_BYTES:
+                p_names, p_types, p_flags, end = await self.hass.async_add_executor_job(_parse_list_block, block)
+            else:
+                p_names, p_types, p_flags, end = _parse_list_block(block)
 
-            payload = line.split(":", 1)[1].strip()
-            if not payload:
+            names.extend(p_names)
+            types.extend(p_types)
+            flags.extend(p_flags)
+            self._list_progress = len(names)
+            _LOGGER.debug("%s:%s LIST: %d variables so far", self.host, self.port, self._list_progress)
+
+            if end >= 0:
+                # čo prišlo za koncom LIST-u, vrátime ďalším čítaniam
+                rest = block[end:] + buf
                 break
 
-            var = payload.split(",", 1)[0].strip()
-            var = var.rstrip("*").rstrip("~")
-            if not var:
-                continue
+        if len(names) >= LIST_EXECUTOR_VARS:
+            catalog = await self.hass.async_add_executor_job(VariableCatalog.from_columns, names, types, flags)
+        else:
+            catalog = VariableCatalog.from_columns(names, types, flags)
 
-            self.variables.append(var)
-            self._var_map[var.lower()] = var
+        self.trace.record(TRACE_RX, f"LIST: {len(catalog)} variables")
+        return catalog, rest
 
     def _parse_get_kv(self, line: str) -> tuple[str | None, str]:
         """
@@ -158,13 +1071,91 @@ class PLCComSClient:
         return (head or None), value
 
     async def async_get(self, var_name: str) -> str:
-        real = self.resolve_var(var_name)
-        async with self._io_lock:
-            self.writer.write((f"GET:{real}\n").encode(ENCODING))
-            await self.writer.drain()
-            line = await self._read_line()
-        _var, value = self._parse_get_kv(line)
-        return value
+        return (await self.async_get_many([var_name]))[0]
+
+    def _reader_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def _async_get_via_reader(self, reals: list[str], mode: int = GET_PLAIN) -> list[str]:
+        """
+        GET počas behu _run(): stream číta výhradne _run(), my len zapíšeme
+        požiadavky a počkáme na futures, ktoré _run() vyrieši.
+        """
+        if not self._subscribed or self.writer is None:
+            raise ConnectionError("PLCComS not connected")
+
+        loop = self.hass.loop
+        futures = []
+        async with self._locked():
+            if self.writer is None:
+                raise ConnectionError("PLCComS not connected")
+            for r in reals:
+                fut = loop.create_future()
+                self._get_waiters.append([self._key(r), fut, mode])
+                futures.append(fut)
+                self._write(f"GET:{r}")
+            sent_at = loop.time()
+            await self._drain()
+
+        try:
+            return list(await asyncio.wait_for(asyncio.gather(*futures), self._request_timeout))
+        except asyncio.TimeoutError:
+            self._timeout_stats["get"] += 1
+            pending = {id(f) for f in futures}
+            waiters = self._get_waiters
+            for w in [w for w in waiters if id(w[1]) in pending]:
+                waiters.remove(w)
+            if self._last_rx < sent_at:
+                # od odoslania neprišlo nič -> spojenie je zaseknuté
+                self._escalate("GET timed out")
+            raise PLCComSTimeout(f"GET of {len(reals)} variables timed out") from None
+
+    def _resolve_get(self, line: str) -> None:
+        """Priradí odpoveď na GET čakajúcemu (podľa mena, inak podľa poradia)."""
+        waiters = self._get_waiters
+        var, value = self._parse_get_kv(line)
+        waiter = None
+        if var:
+            key = self._key(var)
+            for i, w in enumerate(waiters):
+                if w[0] == key:
+                    waiter = w
+                    del waiters[i]
+                    break
+            if waiter is None and not line.startswith("ERROR"):
+                # sonda z watchdogu alebo oneskorená odpoveď po vypršaní termínu
+                return
+        if waiter is None:
+            waiter = waiters.popleft()
+
+        key, fut, mode = waiter
+        if line.startswith("ERROR"):
+            pass
+        elif mode == GET_POLL:
+            self._poll_stats["polled"] += 1
+            if not _same_value(self._values.get(key), value):
+                self._poll_stats["changes"] += 1
+                self._dispatch_guarded(key, value)
+        elif mode == GET_SWEEP:
+            self._sweep_stats["checked"] += 1
+            # porovnanie v poradí streamu -> neprebije novší DIFF
+            cached = self._values.get(key)
+            if cached is None:
+                self._values[key] = value
+            elif not _same_value(cached, value):
+                self._sweep_stats["corrections"] += 1
+                _LOGGER.debug("Anti-entropy correction for %s: %r -> %r", self._key_name(key), cached, value)
+                self._dispatch_guarded(key, value)
+        else:
+            self._values[key] = value
+        if not fut.done():
+            fut.set_result(value)
+
+    def _fail_get_waiters(self, err: Exception) -> None:
+        while self._get_waiters:
+            _key, fut, _mode = self._get_waiters.popleft()
+            if not fut.done():
+                fut.set_exception(err)
 
     async def async_get_many(self, var_names: list[str]) -> list[str]:
         """
@@ -177,12 +1168,19 @@ class PLCComSClient:
 
         reals = [self.resolve_var(v) for v in var_names]
 
-        async with self._io_lock:
+        if self._reader_running():
+            return await self._async_get_via_reader(reals)
+
+        async with self._locked():
+            if self.writer is None:
+                raise ConnectionError("PLCComS not connected")
             for r in reals:
-                self.writer.write((f"GET:{r}\n").encode(ENCODING))
-            await self.writer.drain()
+                self._write(f"GET:{r}")
+            await self._drain()
 
-            lines = [await self._read_line() for _ in reals]
+            # termín platí pre celú dávku, nie pre každý riadok
+            deadline = self.hass.loop.time() + self._request_timeout
+            lines = [await self._read_line_timeout(max(0.0, deadline - self.hass.loop.time())) for _ in reals]
 
         mapped: dict[str, str] = {}
         fallback_values: list[str] = []
@@ -196,31 +1194,441 @@ class PLCComSClient:
             else:
                 fallback_values.append(value)
 
-        # ideálny prípad: všetko mapovateľné podľa mena
         if mapped_count == len(reals):
-            return [mapped.get(r.lower(), "") for r in reals]
-
-        # ak nič nemá var v odpovedi -> poradie
-        if len(fallback_values) == len(reals):
-            return fallback_values
+            # ideálny prípad: všetko mapovateľné podľa mena
+            out = [mapped.get(r.lower(), "") for r in reals]
+        elif len(fallback_values) == len(reals):
+            # ak nič nemá var v odpovedi -> poradie
+            out = fallback_values
+        else:
+            # mixed -> best effort
+            out = []
+            fb_iter = iter(fallback_values)
+            for r in reals:
+                out.append(mapped.get(r.lower(), next(fb_iter, "")))
 
-        # mixed -> best effort
-        out: list[str] = []
-        fb_iter = iter(fallback_values)
-        for r in reals:
-            out.append(mapped.get(r.lower(), next(fb_iter, "")))
+        for r, value in zip(reals, out):
+            self._values[self._key(r)] = value
         return out
 
     async def async_set(self, var_name: str, value: str) -> None:
         real = self.resolve_var(var_name)
-        await self._send(f"SET:{real},{value}")
+        key = self._key(real)
+
+        if self._journaling():
+            self._journal_set(key, real, value)
+            return
+
+        if not self._outbox and self._take_write_token(key, time.monotonic()):
+            self._track_set(key, value)
+            self._write_stats["sent"] += 1
+            try:
+                await self._send(f"SET:{real},{value}")
+            except ConnectionError:
+                # spojenie padlo práve teraz – SET počká na reconnect
+                if not self._journaling():
+                    raise
+                self._journal_set(key, real, value)
+            return
+
+        # nad limitom: podľa politiky odmietneme alebo zaradíme do fronty
+        if self._write_policy == WRITE_POLICY_REJECT:
+            self._write_stats["rejected"] += 1
+            raise PLCComSRateLimited(f"SET {real} rejected by rate limiter")
+        await self._async_enqueue([(key, real, value)], None, real)
+
+    async def _async_enqueue(self, items: list[tuple[int | str, str, str]], group: object | None, label: str) -> None:
+        """
+        Zaradí SET-y do fronty a počká na ich odoslanie. `group` (spoločný objekt
+        všetkých členov) = tieto záznamy sa z fronty uvoľnia len naraz.
+        """
+        new = sum(1 for key, _real, _value in items if key not in self._outbox)
+        if len(self._outbox) + new > WRITE_QUEUE_DEPTH:
+            self._write_stats["rejected"] += len(items)
+            raise PLCComSRateLimited(f"SET {label} rejected, write queue full")
+
+        fut = self.hass.loop.create_future()
+        for key, real, value in items:
+            queued = self._outbox.get(key)
+            if queued is not None:
+                # zlúčenie: posielame len poslednú hodnotu; novšia skupina si záznam prevezme
+                queued[1] = value
+                queued[2].append(fut)
+                if group is not None:
+                    queued[3] = group
+                self._write_stats["merged"] += 1
+            else:
+                self._outbox[key] = [real, value, [fut], group]
+                self._write_stats["queued"] += 1
+        if len(self._outbox) > self._write_stats["max_depth"]:
+            self._write_stats["max_depth"] = len(self._outbox)
+
+        if self._outbox_task is None or self._outbox_task.done():
+            self._outbox_task = self.hass.loop.create_task(self._drain_outbox())
+        try:
+            await asyncio.wait_for(fut, self._request_timeout)
+        except asyncio.TimeoutError:
+            self._timeout_stats["set"] += 1
+            for key, _real, _value in items:
+                queued = self._outbox.get(key)
+                if queued is not None and fut in queued[2]:
+                    queued[2].remove(fut)
+                    if not queued[2]:
+                        del self._outbox[key]
+            raise PLCComSTimeout(f"SET {label} timed out in write queue") from None
+
+    async def async_set_many(self, items: list[tuple[str, str]]) -> None:
+        """
+        Skupina súvisiacich SET-ov jedným zápisom a jedným drain-om – PLC
+        nevidí medzistav medzi nimi. Nad limitom zápisov ide skupina do fronty
+        ako celok a uvoľní sa, až keď sú tokeny pre všetkých členov naraz.
+        """
+        if not items:
+            return
+        pairs = [(self.resolve_var(var), str(value)) for var, value in items]
+        keys = [self._key(real) for real, _value in pairs]
+
+        if self._journaling():
+            # žurnál sa po reconnecte posiela celý jedným zápisom, skupina ostane spolu
+            for key, (real, value) in zip(keys, pairs):
+                self._journal_set(key, real, value)
+            return
+
+        if not self._outbox and self._take_write_tokens(keys, time.monotonic()):
+            async with self._locked():
+                if self.writer is None:
+                    raise ConnectionError("PLCComS not connected")
+                for key, (real, value) in zip(keys, pairs):
+                    self._track_set(key, value)
+                    self._write(f"SET:{real},{value}")
+                self._write_stats["sent"] += len(pairs)
+                await self._drain()
+            return
+
+        label = ", ".join(real for real, _value in pairs)
+        if self._write_policy == WRITE_POLICY_REJECT:
+            self._write_stats["rejected"] += len(pairs)
+            raise PLCComSRateLimited(f"SET {label} rejected by rate limiter")
+        await self._async_enqueue(
+            [(key, real, value) for key, (real, value) in zip(keys, pairs)], object(), label
+        )
+
+    def _take_write_tokens(self, keys: list[int | str], now: float) -> bool:
+        """Všetky tokeny naraz alebo žiadny (skupina sa nedelí)."""
+        need = min(len(keys), self._write_bucket.burst)  # väčšia skupina by nikdy neprešla
+        if self._write_bucket.refill(now) < need:
+            return False
+        buckets = []
+        for key in keys:
+            bucket = self._var_buckets.get(key)
+            if bucket is None:
+                bucket = self._var_buckets[key] = TokenBucket(self._var_rate, max(1.0, self._var_rate))
+            if bucket.refill(now) < 1.0:
+                return False
+            buckets.append(bucket)
+        for bucket in buckets:
+            bucket.tokens -= 1.0
+        self._write_bucket.tokens -= len(keys)
+        return True
+
+    def _take_write_token(self, key: int | str, now: float) -> bool:
+        bucket = self._var_buckets.get(key)
+        if bucket is None:
+            bucket = self._var_buckets[key] = TokenBucket(self._var_rate, max(1.0, self._var_rate))
+        if bucket.refill(now) < 1.0 or self._write_bucket.refill(now) < 1.0:
+            return False
+        bucket.tokens -= 1.0
+        self._write_bucket.tokens -= 1.0
+        return True
+
+    async def _drain_outbox(self) -> None:
+        """Posiela zafrontované SET-y v poradí, ako dovolia tokeny; skupiny vždy celé."""
+        outbox = self._outbox
+        while outbox:
+            now = time.monotonic()
+            ready = []
+            wait = None
+            seen: set[int] = set()
+            for key in list(outbox):
+                entry = outbox.get(key)
+                if entry is None:
+                    continue  # odišiel so skupinou
+                group = entry[3]
+                if group is None:
+                    members = [key]
+                    ok = self._take_write_token(key, now)
+                else:
+                    if id(group) in seen:
+                        continue
+                    seen.add(id(group))
+                    members = [k for k, e in outbox.items() if e[3] is group]
+                    ok = self._take_write_tokens(members, now)
+                if ok:
+                    ready.extend((k, outbox.pop(k)) for k in members)
+                    continue
+                w = self._write_bucket.wait_time(now)
+                for k in members:
+                    bucket = self._var_buckets.get(k)
+                    if bucket is not None:
+                        w = max(w, bucket.wait_time(now))
+                if len(members) > 1:
+                    missing = min(len(members), self._write_bucket.burst) - self._write_bucket.tokens
+                    w = max(w, missing / self._write_bucket.rate)
+                wait = w if wait is None else min(wait, w)
+                if self._write_bucket.tokens < 1.0:
+                    break
+
+            if ready:
+                try:
+                    async with self._locked():
+                        if self.writer is None:
+                            raise ConnectionError("PLCComS not connected")
+                        for key, (real, value, _futs, _group) in ready:
+                            self._track_set(key, value)
+                            self._write(f"SET:{real},{value}")
+                        await self._drain()
+                except Exception as err:
+                    journal = isinstance(err, ConnectionError) and self._journaling()
+                    for key, (real, value, futs, _group) in ready:
+                        failure: Exception | None = err
+                        if journal:
+                            try:
+                                self._journal_set(key, real, value)
+                                failure = None
+                            except ConnectionError as full:
+                                # plný žurnál zlyhá len tento SET, nie celé odosielanie
+                                failure = full
+                        for fut in futs:
+                            if not fut.done():
+                                if failure is None:
+                                    fut.set_result(None)
+                                else:
+                                    fut.set_exception(failure)
+                else:
+                    self._write_stats["sent"] += len(ready)
+                    for _key, (_real, _value, futs, _group) in ready:
+                        for fut in futs:
+                            if not fut.done():
+                                fut.set_result(None)
+            elif wait is not None:
+                await asyncio.sleep(wait)
+
+    def _journaling(self) -> bool:
+        """
+        SET-y sa žurnálujú, kým _run() spojenie neobnoví a žurnál neodošle –
+        nie len kým je TCP dole; inak by priamy SET predbehol starší zo žurnálu.
+        """
+        return self._journal_ttl > 0 and not self._resynced and self._reader_running()
+
+    def _journal_set(self, key: int | str, real: str, value: str) -> None:
+        now = time.monotonic()
+        self._expire_journal(now)
+        entry = self._journal.get(key)
+        if entry is not None:
+            # zlúčenie: po reconnecte pôjde len posledná hodnota
+            entry[1] = value
+            entry[2] = now + self._journal_ttl
+            self._journal_stats["merged"] += 1
+            return
+        if len(self._journal) >= JOURNAL_DEPTH:
+            self._journal_stats["rejected"] += 1
+            raise ConnectionError(f"PLCComS not connected, SET {real} rejected (journal full)")
+        self._journal[key] = [real, value, now + self._journal_ttl]
+        self._journal_stats["journaled"] += 1
+
+    def _expire_journal(self, now: float) -> None:
+        expired = [key for key, entry in self._journal.items() if entry[2] <= now]
+        if expired:
+            self._report_dropped([self._journal.pop(key) for key in expired], "expired")
+
+    def _report_dropped(self, entries: list[list], reason: str) -> None:
+        """reason = "expired" (TTL) alebo "dropped" (odpojenie klienta)."""
+        self._journal_stats[reason] += len(entries)
+        _LOGGER.warning(
+            "%s:%s: %d journaled SET command(s) %s before reconnect: %s",
+            self.host,
+            self.port,
+            len(entries),
+            reason,
+            ", ".join(f"{real}={value}" for real, value, _deadline in entries[:10])
+            + (", ..." if len(entries) > 10 else ""),
+        )
+
+    async def _flush_journal(self) -> None:
+        """
+        Po reconnecte a EN: pošle platné SET-y zo žurnálu jedným zápisom.
+        SET-y pribudnuté počas drain-u idú ďalším kolom; záznam, ktorý medzitým
+        dostal novšiu hodnotu, sa nezmaže.
+        """
+        while True:
+            self._expire_journal(time.monotonic())
+            if not self._journal:
+                return
+            entries = [(key, entry[0], entry[1]) for key, entry in self._journal.items()]
+            async with self._locked():
+                if self.writer is None:
+                    raise ConnectionError("PLCComS not connected")
+                for key, real, value in entries:
+                    self._track_set(key, value)
+                    self._write(f"SET:{self.resolve_var(real)},{value}")
+                await self._drain()
+            # dávka obíde obmedzovač, ale spotrebuje jeho tokeny (ďalšie zápisy počkajú)
+            self._write_bucket.tokens -= len(entries)
+            for key, _real, value in entries:
+                entry = self._journal.get(key)
+                if entry is not None and entry[1] == value:
+                    del self._journal[key]
+            self._journal_stats["replayed"] += len(entries)
+            self._write_stats["sent"] += len(entries)
+            _LOGGER.info("%s:%s: replayed %d journaled SET command(s)", self.host, self.port, len(entries))
+
+    def _track_set(self, key: int | str, value: str) -> None:
+        """Začne merať latenciu SET -> DIFF (ak PLC nejaký DIFF vôbec pošle)."""
+        # rovnaká hodnota ako posledná známa -> PLC DIFF nepošle
+        if _same_value(self._values.get(key), value):
+            return
+
+        old = self._pending_sets.pop(key, None)
+        if old:
+            old[3].cancel()
+
+        cb = self._diff_callbacks.get(key)
+        if isinstance(cb, tuple):
+            cb = cb[0]
+        entity = getattr(cb, "__self__", None)
+        platform = getattr(getattr(entity, "platform", None), "domain", None) or "unknown"
+
+        timer = self.hass.loop.call_later(SET_CONFIRM_TIMEOUT, self._on_set_timeout, key)
+        self._pending_sets[key] = (time.monotonic(), platform, value, timer)
+
+    def _on_set_timeout(self, key: int | str) -> None:
+        pending = self._pending_sets.pop(key, None)
+        if not pending:
+            return
+        _t0, platform, value, _timer = pending
+        self._histogram(platform).unconfirmed += 1
+        _LOGGER.warning(
+            "SET %s=%s not confirmed by PLC within %s s (%s)",
+            self._key_name(key),
+            value,
+            SET_CONFIRM_TIMEOUT,
+            platform,
+        )
+
+    def _histogram(self, platform: str) -> LatencyHistogram:
+        hist = self._latency.get(platform)
+        if hist is None:
+            hist = self._latency[platform] = LatencyHistogram()
+        return hist
+
+    def _shard_names(self, index: int) -> list[str]:
+        """Odoberané premenné spojenia `index` (0 = hlavné); bez shardov všetky z odberu."""
+        n = len(self._shards) + 1
+        interest = self._interest()
+        return [
+            name
+            for name in self.catalog.names
+            if shard_of(name.lower(), n) == index and (interest is None or name.lower() in interest)
+        ]
 
     async def async_subscribe(self) -> None:
         if self._subscribed:
             return
-        await self._send(SUBSCRIBE_WILDCARD)
+        if not self._shards and self._interest() is None:
+            await self._send(SUBSCRIBE_WILDCARD)
+        else:
+            # len svoja časť a/alebo premenné entry s filtrom (vrátane __plc_run)
+            names = self._shard_names(0)
+            if self.catalog.id_of_lower("__plc_run") < 0:
+                names.append("__plc_run")
+            async with self._locked():
+                if self.writer is None:
+                    raise ConnectionError("PLCComS not connected")
+                for name in names:
+                    self._write(f"EN:{name}")
+                await self._drain()
         self._subscribed = True
 
+    async def _shard_loop(self, shard: _Shard) -> None:
+        """
+        Čítač jedného doplnkového spojenia. DIFF-y idú do rovnakého spracovania
+        ako z _run(); každá premenná má práve jedno spojenie, poradie jej
+        zmien sa teda zachová. Po výpadku reconnect s rovnakým backoffom ako
+        hlavné spojenie, po zámernom zhodení (nový katalóg) hneď.
+        """
+        delay = RECONNECT_MIN_DELAY
+        while not self._stop_event.is_set():
+            writer = None
+            subscribed = False
+            try:
+                try:
+                    reader, writer = await asyncio.wait_for(
+                        asyncio.open_connection(self.host, self.port), CONNECT_TIMEOUT
+                    )
+                except asyncio.TimeoutError:
+                    raise PLCComSTimeout(f"Connect to {self.host}:{self.port} timed out") from None
+                sock = writer.get_extra_info("socket")
+                if sock is not None:
+                    _enable_tcp_keepalive(sock)
+
+                names = self._shard_names(shard.index)
+                for name in names:
+                    writer.write(f"EN:{name}\n".encode(ENCODING))
+                await asyncio.wait_for(writer.drain(), self._request_timeout)
+                self.trace.record(TRACE_TX, f"EN: x{len(names)} (connection {shard.index})")
+
+                shard.writer = writer
+                shard.pending = False
+                subscribed = True
+                shard.connects += 1
+                shard.last_rx = self.hass.loop.time()
+                shard.probe_sent_at = None
+                delay = RECONNECT_MIN_DELAY
+                self._refresh_available()
+                # DIFF-y z obdobia bez spojenia sú stratené -> dorovnať cez GET
+                self.hass.async_create_task(self._resync_shard(shard))
+
+                while True:
+                    line = await reader.readline()
+                    if not line:
+                        raise ConnectionError("PLCComS connection closed")
+                    shard.last_rx = self.hass.loop.time()
+                    if line.startswith(b"DIFF:"):
+                        shard.diffs += 1
+                        self._on_diff(line[5:].decode(ENCODING, errors="replace").strip())
+            except asyncio.CancelledError:
+                raise
+            except Exception as err:
+                _LOGGER.debug("%s:%s connection %d lost: %s", self.host, self.port, shard.index, err)
+            finally:
+                shard.writer = None
+                if writer is not None:
+                    writer.transport.abort()
+            if shard.pending and subscribed:
+                continue  # zámerné zhodenie (nový katalóg) – prihlásiť sa hneď
+            shard.pending = False
+            self._refresh_available()
+            await asyncio.sleep(delay)
+            delay = min(int(delay * 1.6), RECONNECT_MAX_DELAY)
+
+    async def _resync_shard(self, shard: _Shard) -> None:
+        """GET odoberaných premenných shardu cez hlavné spojenie; rozdiely idú ako DIFF."""
+        # po novom katalógu sa hlavné spojenie prihlasuje súbežne – počkať naň
+        deadline = self.hass.loop.time() + CONNECT_TIMEOUT
+        while not self._subscribed and self.hass.loop.time() < deadline:
+            await asyncio.sleep(POLL_TICK)
+        n = len(self._shards) + 1
+        keys = [k for k in self._diff_callbacks if shard_of(self._key_name(k).lower(), n) == shard.index]
+        for i in range(0, len(keys), SWEEP_BATCH):
+            names = [self._key_name(k) for k in keys[i : i + SWEEP_BATCH] if k in self._diff_callbacks]
+            try:
+                await self._async_get_via_reader(names, GET_SWEEP)
+            except (ConnectionError, OSError) as err:
+                # hlavné spojenie je dole – po jeho obnove aj tak príde čerstvý stav
+                _LOGGER.debug("%s:%s resync of connection %d skipped: %s", self.host, self.port, shard.index, err)
+                return
+        shard.resyncs += 1
+
     async def _run(self) -> None:
         delay = RECONNECT_MIN_DELAY
         while not self._stop_event.is_set():
@@ -231,45 +1639,313 @@ class PLCComSClient:
 
                 if not self._subscribed:
                     await self.async_subscribe()
+                    await self._flush_journal()
+                    # bez await medzi flush-om a príznakom -> žiadny SET sa nepredbehne
+                    self._resynced = True
+                    if self._reflex:
+                        self.hass.async_create_task(self._prefetch_reflex_targets())
 
                 line = await self._read_line()
                 if not line.startswith("DIFF:"):
+                    if self._get_waiters and (line.startswith("GET:") or line.startswith("ERROR")):
+                        self._resolve_get(line)
                     continue
 
-                body = line[5:]
-                if "," not in body:
-                    continue
-
-                var, value = body.split(",", 1)
-                var_lower = var.lower()
-                value_stripped = value.strip()
-
-                # PLC restart hook
-                if var_lower == "__plc_run":
-                    try:
-                        plc_run_value = int(value_stripped)
-                        if self._plc_run_state == 0 and plc_run_value == 1:
-                            await asyncio.sleep(2)
-                            await self._reload_variables()
-                            if self._restart_callback:
-                                self.hass.async_create_task(self._restart_callback())
-                        self._plc_run_state = plc_run_value
-                    except (ValueError, TypeError):
-                        pass
-
-                cb = self._diff_callbacks.get(var_lower)
-                if cb:
-                    cb(value_stripped)
+                self._on_diff(line[5:])
 
             except Exception:
+                self._drop_connection()
                 await asyncio.sleep(delay)
                 delay = min(int(delay * 1.6), RECONNECT_MAX_DELAY)
-                self._connected = False
-                self._subscribed = False
 
-    async def _reload_variables(self) -> None:
+    def _on_diff(self, body: str) -> None:
+        """Telo DIFF riadku z hlavného spojenia aj zo shardov."""
+        if "," not in body:
+            return
+
+        var, value = body.split(",", 1)
+        var_lower = var.lower()
+        value_stripped = value.strip()
+
+        # PLC restart hook – obnova katalógu beží vo vlastnej úlohe
+        if var_lower == "__plc_run":
+            try:
+                plc_run_value = int(value_stripped)
+            except (ValueError, TypeError):
+                plc_run_value = None
+            if plc_run_value is not None:
+                if self._plc_run_state == 0 and plc_run_value == 1:
+                    self._start_restart()
+                self._plc_run_state = plc_run_value
+
+        if self._held is not None:
+            # počas výmeny katalógu držíme len poslednú hodnotu každej premennej
+            self._held[var_lower] = value_stripped
+            return
+
+        vid = self.catalog.id_of_lower(var_lower)
+        self._dispatch_guarded(var_lower if vid < 0 else vid, value_stripped)
+
+    def _dispatch_guarded(self, key: int | str, value: str) -> None:
+        """_dispatch z čítača (DIFF, GET, replay): výnimka callbacku sa len zaloguje."""
         try:
-            await self._send("LIST:")
-            await self._read_list()
+            self._dispatch(key, value)
         except Exception:
-            pass
\ No newline at end of file
+            # chyba v entite nesmie zhodiť spojenie (to by znamenalo reconnect + LIST)
+            _LOGGER.exception("Error dispatching value of %s", self._key_name(key))
+
+    def _run_reflex(self, bindings: list[ReflexBinding], old: str | None, new: str) -> None:
+        """
+        Reflex priamo z DIFF-u: SET-y všetkých spustených väzieb zapíšeme
+        synchrónne jedným blokom (bez await, bez HA automatizácií).
+        Nad limitom zápisov idú SET-y cez bežnú frontu async_set.
+        """
+        if self.writer is None:
+            self._reflex_stats["skipped"] += 1
+            return
+        now = time.monotonic()
+        for binding in bindings:
+            if not binding.matches(old, new):
+                continue
+            self._reflex_stats["fired"] += 1
+            for target in binding.targets:
+                real = self.resolve_var(target)
+                tkey = self._key(real)
+                value = binding.target_value(self._values.get(tkey))
+                if value is None:
+                    self._reflex_stats["skipped"] += 1
+                elif not self._outbox and self._take_write_token(tkey, now):
+                    self._track_set(tkey, value)
+                    self._write(f"SET:{real},{value}")
+                    self._write_stats["sent"] += 1
+                    self._reflex_stats["writes"] += 1
+                else:
+                    self._reflex_stats["queued"] += 1
+                    self.hass.async_create_task(self._async_reflex_set(real, value))
+
+    async def _prefetch_reflex_targets(self) -> None:
+        """Ciele väzieb bez známej hodnoty (napr. mimo filtra) – toggle/step ich inak preskočí."""
+        names = {
+            self.resolve_var(t)
+            for bindings in self._reflex.values()
+            for b in bindings
+            for t in b.targets
+            if self._key(self.resolve_var(t)) not in self._values
+        }
+        names = [name for name in names if self.catalog.id_of(name) >= 0]
+        for i in range(0, len(names), SWEEP_BATCH):
+            try:
+                await self._async_get_via_reader(names[i : i + SWEEP_BATCH], GET_SWEEP)
+            except (ConnectionError, OSError) as err:
+                _LOGGER.debug("%s:%s reflex target prefetch skipped: %s", self.host, self.port, err)
+                return
+
+    async def _async_reflex_set(self, real: str, value: str) -> None:
+        try:
+            await self.async_set(real, value)
+        except (ConnectionError, OSError, PLCComSRateLimited) as err:
+            _LOGGER.warning("Reflex SET %s=%s failed: %s", real, value, err)
+
+    def _start_restart(self) -> None:
+        if self._restart_task is not None and not self._restart_task.done():
+            return
+        self._restart_stats["restarts"] += 1
+        self._held = {}
+        self._restart_task = self.hass.loop.create_task(self._handle_restart())
+
+    async def _handle_restart(self) -> None:
+        """
+        Reštart PLC (__plc_run 0 -> 1): nový LIST cez bočné spojenie, takže
+        hlavný stream ďalej číta _run() a DIFF-y sa do LIST-u nemiešajú.
+        Dispatch je zatiaľ pozastavený; po výmene katalógu sa držané hodnoty
+        doručia už s novými id a zavolá sa restart callback.
+        """
+        try:
+            catalog = None
+            for attempt in range(1, RESTART_LIST_ATTEMPTS + 1):
+                await asyncio.sleep(RESTART_SETTLE_DELAY * attempt)
+                try:
+                    catalog = await self._side_list()
+                    break
+                except (ConnectionError, OSError) as err:
+                    _LOGGER.warning(
+                        "%s:%s LIST after PLC restart failed (attempt %d/%d): %s",
+                        self.host,
+                        self.port,
+                        attempt,
+                        RESTART_LIST_ATTEMPTS,
+                        err,
+                    )
+            if catalog is None:
+                self._restart_stats["failures"] += 1
+            else:
+                self._set_catalog(catalog)
+        finally:
+            held, self._held = self._held or {}, None
+            self._restart_stats["held"] += len(held)
+            for var_lower, value in held.items():
+                vid = self.catalog.id_of_lower(var_lower)
+                # jedna chybná entita nesmie zastaviť replay ani reload entry nižšie
+                self._dispatch_guarded(var_lower if vid < 0 else vid, value)
+
+        for callback in tuple(self._restart_callbacks):
+            self.hass.async_create_task(callback())
+
+    async def _side_list(self) -> VariableCatalog:
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), CONNECT_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            raise PLCComSTimeout(f"Connect to {self.host}:{self.port} timed out") from None
+        try:
+            self.trace.record(TRACE_TX, "LIST: (side channel)")
+            writer.write(b"LIST:\n")
+            await asyncio.wait_for(writer.drain(), self._request_timeout)
+            catalog, _rest = await self._fetch_list(reader, b"")
+            return catalog
+        except asyncio.TimeoutError:
+            raise PLCComSTimeout("Side channel LIST timed out") from None
+        finally:
+            writer.close()
+
+    async def _sweep_loop(self) -> None:
+        """
+        Anti-entropy: pomaly prechádza odoberané premenné po dávkach GET-ov.
+        Odpovede sa porovnajú s poslednou známou hodnotou priamo v _run()
+        a rozdiely sa pošlú entitám ako DIFF. Jeden cyklus trvá ~sweep_interval.
+        """
+        while not self._stop_event.is_set():
+            keys = list(self._diff_callbacks)
+            batches = [keys[i : i + SWEEP_BATCH] for i in range(0, len(keys), SWEEP_BATCH)]
+            pause = self._sweep_interval / max(1, len(batches))
+
+            for batch in batches:
+                await asyncio.sleep(pause)
+                if not self._subscribed:
+                    break
+                names = [self._key_name(k) for k in batch if k in self._diff_callbacks]
+                try:
+                    await self._async_get_via_reader(names, GET_SWEEP)
+                except (ConnectionError, OSError):
+                    break
+            else:
+                self._sweep_stats["cycles"] += 1
+                if not batches:
+                    await asyncio.sleep(self._sweep_interval)
+                continue
+
+            # spojenie nie je pripravené – skúsime znova neskôr
+            await asyncio.sleep(min(self._sweep_interval, RECONNECT_MAX_DELAY))
+
+    async def _poll_loop(self) -> None:
+        """
+        Plánovač poll fallbacku: v každom ticku zlúči všetky splatné premenné
+        do jedného pipelinovaného GET-u. Nový termín = interval ± jitter.
+        """
+        heap = self._poll_heap
+        while not self._stop_event.is_set():
+            if not heap:
+                self._poll_wakeup.clear()
+                await self._poll_wakeup.wait()
+                continue
+
+            now = time.monotonic()
+            wait = heap[0][0] - now
+            if wait > 0:
+                self._poll_wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._poll_wakeup.wait(), max(wait, POLL_TICK))
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            # všetko splatné do konca ticku ide v jednej dávke
+            horizon = now + POLL_TICK
+            due: dict[int | str, None] = {}  # bez duplicít, v poradí termínov
+            while heap and heap[0][0] <= horizon and len(due) < POLL_MAX_BATCH:
+                _due, seq, key = heapq.heappop(heap)
+                poll = self._polls.get(key)
+                if poll is None or poll[1] != seq or key in due:
+                    continue  # odhlásená, preplánovaná alebo už v tejto dávke
+                interval = poll[0]
+                due[key] = None
+                # nový termín nikdy nepadne do tej istej dávky (za koniec ticku)
+                jitter = interval * POLL_JITTER
+                nxt = now + interval + random.uniform(-jitter, jitter)
+                self._schedule_poll(key, max(nxt, horizon + POLL_TICK * POLL_JITTER))
+
+            if not due:
+                continue
+            self._poll_stats["ticks"] += 1
+            if not self._subscribed:
+                continue
+            try:
+                await self._async_get_via_reader([self._key_name(k) for k in due], GET_POLL)
+            except (ConnectionError, OSError):
+                pass
+
+    def _drop_connection(self) -> None:
+        """Zahodí (možno polootvorené) spojenie, aby ďalší connect začal načisto."""
+        self._fail_get_waiters(ConnectionError("PLCComS connection lost"))
+        if self.writer is not None:
+            self.writer.transport.abort()
+        self.reader = None
+        self.writer = None
+        self._connected = False
+        self._subscribed = False
+        self._probe_sent_at = None
+        self._resynced = False
+        self._set_available(False)
+
+    def _dispatch(self, key: int | str, value: str) -> None:
+        if self._reflex:
+            bindings = self._reflex.get(key)
+            if bindings:
+                self._run_reflex(bindings, self._values.get(key), value)
+        self._values[key] = value
+
+        if self._pending_sets:
+            pending = self._pending_sets.pop(key, None)
+            if pending:
+                t0, platform, _value, timer = pending
+                timer.cancel()
+                self._histogram(platform).add(time.monotonic() - t0)
+
+        cb = self._diff_callbacks.get(key)
+        if not cb:
+            return
+        if self._profile_threshold is None:
+            if isinstance(cb, tuple):
+                for one in cb:
+                    one(value)
+            else:
+                cb(value)
+            return
+
+        t0 = time.perf_counter()
+        try:
+            if isinstance(cb, tuple):
+                for one in cb:
+                    one(value)
+                cb = cb[0]
+            else:
+                cb(value)
+        finally:
+            elapsed = time.perf_counter() - t0
+            st = self._dispatch_stats.get(key)
+            if st is None:
+                self._dispatch_stats[key] = [1, elapsed, elapsed]
+            else:
+                st[0] += 1
+                st[1] += elapsed
+                if elapsed > st[2]:
+                    st[2] = elapsed
+            if elapsed >= self._profile_threshold:
+                entity = getattr(cb, "__self__", None)
+                _LOGGER.warning(
+                    "Slow DIFF callback for %s (%s): %.1f ms",
+                    self._key_name(key),
+                    getattr(entity, "entity_id", None) or type(entity).__name__,
+                    elapsed * 1000.0,
+                )
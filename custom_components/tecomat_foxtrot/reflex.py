@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import yaml
+
+from .const import BUTTON_DEFAULT_MODULUS, BUTTON_MAX_DELTA, COUNTER_TYPE_MODULUS
+
+# spúšťač väzby (zmena zdrojovej premennej)
+TRIGGER_CHANGE = "change"  # akákoľvek zmena
+TRIGGER_INCREMENT = "increment"  # počítadlo sa zvýšilo (klik, stlačenie)
+TRIGGER_RISING = "rising"  # 0 -> nenulová hodnota
+TRIGGER_FALLING = "falling"  # nenulová hodnota -> 0
+TRIGGERS = (TRIGGER_CHANGE, TRIGGER_INCREMENT, TRIGGER_RISING, TRIGGER_FALLING)
+
+# akcia na cieľových premenných
+ACTION_TOGGLE = "toggle"
+ACTION_SET = "set"
+ACTION_STEP = "step"
+ACTIONS = (ACTION_TOGGLE, ACTION_SET, ACTION_STEP)
+
+
+
+def counter_modulus(catalog, var: str) -> int:
+    """Rozsah počítadla podľa typu premennej v katalógu (neznáma -> 16 bitov)."""
+    vid = catalog.id_of(var)
+    if vid < 0:
+        return BUTTON_DEFAULT_MODULUS
+    return COUNTER_TYPE_MODULUS.get(catalog.type_of(vid).lower(), BUTTON_DEFAULT_MODULUS)
+
+
+def _truthy(value: str | None) -> bool:
+    t = (value or "").strip().strip('"').lower()
+    if t in ("true", "on"):
+        return True
+    try:
+        return float(t.replace(",", ".")) != 0
+    except ValueError:
+        return False
+
+
+def _number(value: str | None) -> float | None:
+    try:
+        return float((value or "").strip().strip('"').replace(",", "."))
+    except ValueError:
+        return None
+
+
+class ReflexBinding:
+    """
+    Väzba PLC vstup -> PLC výstup vyhodnocovaná priamo v dispatch-i klienta.
+
+        - source: MAIN.SCHODY_GTSAP1_BUTTON_CLICKCNT
+          on: increment
+          action: toggle
+          target: [MAIN.SCHODY_GTSAP1_LIGHT1_ONOFF]
+    """
+
+    __slots__ = ("source", "trigger", "equals", "action", "targets", "value", "step", "min", "max", "modulus")
+
+    def __init__(self, source: str, trigger: str, action: str, targets: list[str], **kw):
+        self.source = source
+        self.trigger = trigger
+        self.equals: str | None = kw.get("equals")
+        self.action = action
+        self.targets = targets
+        self.value: str | None = kw.get("value")
+        self.step: float = kw.get("step", 1.0)
+        self.min: float | None = kw.get("min")
+        self.max: float | None = kw.get("max")
+        # rozsah zdrojového počítadla; nastaví klient podľa katalógu
+        self.modulus: int = BUTTON_DEFAULT_MODULUS
+
+    def matches(self, old: str | None, new: str) -> bool:
+        """Spustí sa väzba pri zmene `old` -> `new`? (prvá známa hodnota nič nespúšťa)"""
+        if old is None or old == new:
+            return False
+        if self.equals is not None and new.strip().strip('"') != self.equals:
+            return False
+        if self.trigger == TRIGGER_CHANGE:
+            return True
+        if self.trigger == TRIGGER_RISING:
+            return not _truthy(old) and _truthy(new)
+        if self.trigger == TRIGGER_FALLING:
+            return _truthy(old) and not _truthy(new)
+        # increment: prírastok modulo rozsah typu (pretečenie); veľký skok = reset, nie klik
+        a, b = _number(old), _number(new)
+        if a is None or b is None:
+            return False
+        if a != int(a) or b != int(b):
+            return b > a
+        return 0 < (int(b) - int(a)) % self.modulus <= BUTTON_MAX_DELTA
+
+    def target_value(self, current: str | None) -> str | None:
+        """Nová hodnota cieľa podľa akcie; None = nie je čo zapísať (aj neznámy stav pri toggle/step)."""
+        if self.action == ACTION_SET:
+            return self.value
+        if self.action == ACTION_TOGGLE:
+            # neznámy stav cieľa: prepnutie by vždy len zaplo
+            if current is None:
+                return None
+            return "0" if _truthy(current) else "1"
+        cur = _number(current)
+        if cur is None:
+            return None
+        out = cur + self.step
+        if self.min is not None and out < self.min:
+            out = self.min
+        if self.max is not None and out > self.max:
+            out = self.max
+        return str(int(out)) if out == int(out) else str(out)
+
+
+def _opt_float(raw: dict, key: str, where: str) -> float | None:
+    if raw.get(key) is None:
+        return None
+    try:
+        return float(raw[key])
+    except (TypeError, ValueError):
+        raise ValueError(f"{where}: '{key}' must be a number") from None
+
+
+def parse_bindings(text: str | None) -> list[ReflexBinding]:
+    """YAML zoznam väzieb z options flow. Chyby -> ValueError s popisom."""
+    if not text or not str(text).strip():
+        return []
+    try:
+        data = yaml.safe_load(text)
+    except yaml.YAMLError as err:
+        raise ValueError(f"invalid YAML: {err}") from None
+    if data is None:
+        return []
+    if not isinstance(data, list):
+        raise ValueError("expected a list of bindings")
+
+    out: list[ReflexBinding] = []
+    for i, raw in enumerate(data, 1):
+        where = f"binding {i}"
+        if not isinstance(raw, dict):
+            raise ValueError(f"{where}: expected a mapping")
+
+        source = str(raw.get("source") or "").strip()
+        if not source:
+            raise ValueError(f"{where}: 'source' is required")
+
+        # YAML 1.1 číta holé `on` ako True
+        trigger = str(raw.get("on", raw.get(True, TRIGGER_CHANGE))).strip().lower()
+        if trigger not in TRIGGERS:
+            raise ValueError(f"{where}: 'on' must be one of {', '.join(TRIGGERS)}")
+
+        action = str(raw.get("action") or "").strip().lower()
+        if action not in ACTIONS:
+            raise ValueError(f"{where}: 'action' must be one of {', '.join(ACTIONS)}")
+
+        targets = raw.get("target")
+        if isinstance(targets, str):
+            targets = [targets]
+        if not targets or not all(isinstance(t, str) and t.strip() for t in targets):
+            raise ValueError(f"{where}: 'target' must be a variable name or a list of names")
+
+        kw = {}
+        if raw.get("equals") is not None:
+            kw["equals"] = str(raw["equals"]).strip()
+        if action == ACTION_SET:
+            if raw.get("value") is None:
+                raise ValueError(f"{where}: action 'set' needs 'value'")
+            value = raw["value"]
+            kw["value"] = ("1" if value else "0") if isinstance(value, bool) else str(value)
+        elif action == ACTION_STEP:
+            step = _opt_float(raw, "step", where)
+            kw["step"] = 1.0 if step is None else step
+            kw["min"] = _opt_float(raw, "min", where)
+            kw["max"] = _opt_float(raw, "max", where)
+
+        out.append(ReflexBinding(source, trigger, action, [t.strip() for t in targets], **kw))
+    return out
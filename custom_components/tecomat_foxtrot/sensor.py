@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+import logging
 import re
+import time
 from homeassistant.components.sensor import SensorDeviceClass, SensorEntity, SensorStateClass
 from homeassistant.const import UnitOfTemperature
 from homeassistant.core import HomeAssistant
@@ -11,7 +13,19 @@ from .const import (
     SENSOR_DISPLAY_SYMBOL_CO, SENSOR_DISPLAY_SYMBOL_TEMP,
     SENSOR_DISPLAY_SYMBOL_HUMIDITY, SENSOR_DISPLAY_SYMBOL_GENERIC,
     SENSOR_DISPLAY_TYPE_REAL,
+    CONF_STATS_WINDOWS,
+    CONF_STATS_INCLUDE,
+    CONF_STATS_INTERVAL,
+    DEFAULT_STATS_INTERVAL,
+    STATS_BINS,
 )
+from .filters import ALLOW_ALL, BasePathFilter, split_patterns
+from .entity import PLCAvailability, PolledName, async_add_entities_staged
+from .stats import WindowStats, parse_windows
+
+_LOGGER = logging.getLogger(__name__)
+
+STAT_KINDS = ("mean", "min", "max", "rate")
 
 
 def _to_float(raw: str) -> float:
@@ -46,12 +60,14 @@ def _slugify_plc_id(plc_id: str) -> str:
     return s
 
 
-def _discover_displays(client):
+def _discover_displays(client, flt=ALLOW_ALL):
     out = []
     for value_var in client.variables:
         if not value_var.lower().endswith(f"{DISP.lower()}_value"):
             continue
         base = value_var.rsplit(".", 1)[0]
+        if not flt.allows(base):
+            continue
         plc_base = base.rsplit("_DISPLAY", 1)[0] if base.upper().endswith("_DISPLAY") else base
         slug = _slugify_plc_id(plc_base)
         suggested_entity_id = f"sensor.{slug}"
@@ -61,9 +77,9 @@ def _discover_displays(client):
     return out
 
 
-def get_required_var_names(client) -> list[str]:
+def get_required_var_names(client, flt=ALLOW_ALL) -> list[str]:
     out = []
-    for value_var, base, _plc_base, _eid in _discover_displays(client):
+    for value_var, base, _plc_base, _eid in _discover_displays(client, flt):
         out.extend([
             f"{base}.{DISP}_TYPE", f"{base}.{DISP}_SYMBOL", f"{base}.{DISP}_NAME",
             f"{base}.{DISP}_UNIT", value_var, f"{base}.{DISP}_PRECISION",
@@ -77,7 +93,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
     entities: list[SensorEntity] = []
 
     entry_id = entry.entry_id
-    candidates = _discover_displays(client)
+    candidates = _discover_displays(client, entry_data.get("filter", ALLOW_ALL))
 
     values = entry_data.get("initial_values_sensor") or []
     idx = 0
@@ -129,17 +145,133 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
         elif symbol == SENSOR_DISPLAY_SYMBOL_CO:
             entities.append(TecomatCOSensor(**common_args))
 
-    async_add_entities(entities)
+    entities.extend(_setup_display_stats(hass, entry, entities))
+    await async_add_entities_staged(hass, entry, async_add_entities, entities)
+
+    # počítadlá tlačidiel – len ak projekt nejaké tlačidlá má
+    if entry_data.get("initial_values_event"):
+        from .event import async_setup_counter_sensors
+        await async_setup_counter_sensors(hass, entry, async_add_entities)
 
-    # event senzory (button counters)
-    from .event import async_setup_entry as async_setup_event_entry
-    await async_setup_event_entry(hass, entry, async_add_entities)
+
+def _setup_display_stats(hass: HomeAssistant, entry: ConfigEntry, displays: list) -> list[SensorEntity]:
+    """
+    Voliteľné štatistiky displejov: každý vybraný displej dostane pre každé
+    okno koše plnené priamo z DIFF callbacku a senzory mean/min/max/rate,
+    ktoré sa publikujú len raz za `stats_interval`. V rovnakom takte sa
+    zapisuje aj surový stav týchto displejov (nie na každý DIFF).
+    """
+    try:
+        windows = parse_windows(entry.options.get(CONF_STATS_WINDOWS))
+    except ValueError as err:
+        _LOGGER.error("Invalid statistics windows, statistics disabled: %s", err)
+        return []
+    if not windows:
+        return []
+
+    flt = BasePathFilter(split_patterns(entry.options.get(CONF_STATS_INCLUDE)))
+    now = time.monotonic()
+    publisher = _StatsPublisher(hass, float(entry.options.get(CONF_STATS_INTERVAL, DEFAULT_STATS_INTERVAL)))
+    out: list[SensorEntity] = []
+
+    for display in displays:
+        if not flt.allows(display.plc_base):
+            continue
+        display.stats = []
+        publisher.displays.append(display)
+        for minutes in windows:
+            ring = WindowStats(minutes * 60.0, STATS_BINS, display._attr_native_value, now)
+            display.stats.append(ring)
+            group = [TecomatDisplayStatSensor(display, ring, minutes, kind, entry.entry_id) for kind in STAT_KINDS]
+            publisher.groups.append((ring, group))
+            out.extend(group)
+
+    if out:
+        publisher.start()
+        entry.async_on_unload(publisher.stop)
+    return out
 
 
-class _TecomatRealPushSensor(SensorEntity):
+class _StatsPublisher:
+    """Jeden časovač slučky pre všetky štatistiky entry; okno sa počíta raz pre 4 senzory."""
+
+    def __init__(self, hass: HomeAssistant, interval: float):
+        self.hass = hass
+        self.interval = max(1.0, interval)
+        self.groups: list[tuple[WindowStats, list]] = []
+        self.displays: list = []
+        self._timer = None
+
+    def start(self) -> None:
+        self._timer = self.hass.loop.call_later(self.interval, self._tick)
+
+    def stop(self) -> None:
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+
+    def _tick(self) -> None:
+        self._timer = self.hass.loop.call_later(self.interval, self._tick)
+        now = time.monotonic()
+        for display in self.displays:
+            if display.stats_dirty and display.hass is not None:
+                display.stats_dirty = False
+                display.async_write_ha_state()
+        for ring, sensors in self.groups:
+            result = ring.window(now)
+            if result is None:
+                continue
+            covered = result["covered"]
+            for sensor in sensors:
+                sensor.publish(result[sensor.kind], covered)
+
+
+class TecomatDisplayStatSensor(PLCAvailability, SensorEntity):
+    _attr_should_poll = False
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(self, display, ring: WindowStats, minutes: int, kind: str, entry_id: str):
+        self._client = display._client
+        self._ring = ring
+        self.kind = kind
+        self._digits = display.stats_digits
+        self._attr_name = f"{display._attr_name} {kind} {minutes} min"
+        self._attr_unique_id = f"{DOMAIN}:{entry_id}:{display.plc_base}_{kind}_{minutes}m"
+        self.entity_id = f"{display.entity_id}_{kind}_{minutes}m"
+        self._attr_device_info = {"identifiers": {(DOMAIN, entry_id)}}
+        unit = display._attr_native_unit_of_measurement
+        if kind == "rate":
+            self._attr_native_unit_of_measurement = f"{unit}/min" if unit else "/min"
+            self._digits += 1
+        else:
+            self._attr_native_unit_of_measurement = unit
+            self._attr_device_class = getattr(display, "_attr_device_class", None)
+        self._attr_native_value = None
+        self._attr_extra_state_attributes = {"covered_minutes": 0.0}
+        if ring.last is not None and kind != "rate":
+            self._attr_native_value = round(ring.last, self._digits)
+
+    def publish(self, value: float, covered: float) -> None:
+        """`covered` = koľko sekúnd dát okno skutočne obsahuje (po štarte menej)."""
+        value = round(value, self._digits)
+        covered_min = round(covered / 60.0, 1)
+        if self.hass is None or (
+            value == self._attr_native_value and covered_min == self._attr_extra_state_attributes["covered_minutes"]
+        ):
+            return
+        self._attr_native_value = value
+        self._attr_extra_state_attributes = {"covered_minutes": covered_min}
+        self.async_write_ha_state()
+
+
+class _TecomatRealPushSensor(PLCAvailability, SensorEntity):
     _ROUND_N: int | None = None
     _attr_should_poll = False
 
+    @property
+    def stats_digits(self) -> int:
+        return 2 if self._ROUND_N is None else self._ROUND_N
+
     def __init__(self, name, client, plc_base, suggested_entity_id, value_var, unit, initial_value, entry_id):
         self._attr_name = name
         self._client = client
@@ -150,16 +282,33 @@ class _TecomatRealPushSensor(SensorEntity):
         self._attr_native_unit_of_measurement = unit
         self._attr_state_class = SensorStateClass.MEASUREMENT
         self._attr_device_info = {"identifiers": {(DOMAIN, entry_id)}}
-        self._client.register_value_entity(self._value_var, self._on_diff_value)
+        self._polled_name = PolledName(self, client, f"{value_var.rsplit('.', 1)[0]}.{DISP}_NAME")
+        self.plc_base = plc_base
+        self.stats: list[WindowStats] = []
+        self.stats_dirty = False
+
+    async def async_added_to_hass(self) -> None:
+        # až teraz (entita má hass); zmeškané DIFF-y doručí replay
+        self._register_value(self._value_var, self._on_diff_value)
+        self._polled_name.attach()
 
     async def async_will_remove_from_hass(self) -> None:
-        self._client.unregister_value_entity(self._value_var)
+        self._polled_name.detach()
+        self._client.unregister_value_entity(self._value_var, self._on_diff_value)
 
     def _on_diff_value(self, raw_value: str) -> None:
         try:
             val = _to_float(raw_value)
+            if self.stats:
+                now = time.monotonic()
+                for ring in self.stats:
+                    ring.add(now, val)
             self._attr_native_value = round(val, self._ROUND_N) if self._ROUND_N is not None else val
-            self.async_write_ha_state()
+            if self.stats:
+                # stav sa zapíše v takte štatistík (_StatsPublisher), nie na každý DIFF
+                self.stats_dirty = True
+            else:
+                self.async_write_ha_state()
         except Exception:
             pass
 
@@ -202,7 +351,7 @@ class TecomatCOSensor(_TecomatRealPushSensor):
     _ROUND_N = 0
 
 
-class TecomatGenericDisplaySensor(SensorEntity):
+class TecomatGenericDisplaySensor(PLCAvailability, SensorEntity):
     _attr_should_poll = False
 
     def __init__(self, name, client, plc_base, suggested_entity_id, value_var, unit, initial_value, entry_id, precision: int = 0):
@@ -212,19 +361,37 @@ class TecomatGenericDisplaySensor(SensorEntity):
         self._attr_unique_id = f"{DOMAIN}:{entry_id}:{plc_base}"  # ponechané
         self.entity_id = suggested_entity_id
         self._precision = int(precision or 0)
+        self.stats_digits = self._precision
         self._attr_native_value = round(initial_value, self._precision)
         self._attr_native_unit_of_measurement = unit
         self._attr_state_class = SensorStateClass.MEASUREMENT
         self._attr_device_info = {"identifiers": {(DOMAIN, entry_id)}}
-        self._client.register_value_entity(self._value_var, self._on_diff_value)
+        self._polled_name = PolledName(self, client, f"{value_var.rsplit('.', 1)[0]}.{DISP}_NAME")
+        self.plc_base = plc_base
+        self.stats: list[WindowStats] = []
+        self.stats_dirty = False
+
+    async def async_added_to_hass(self) -> None:
+        # až teraz (entita má hass); zmeškané DIFF-y doručí replay
+        self._register_value(self._value_var, self._on_diff_value)
+        self._polled_name.attach()
 
     async def async_will_remove_from_hass(self) -> None:
-        self._client.unregister_value_entity(self._value_var)
+        self._polled_name.detach()
+        self._client.unregister_value_entity(self._value_var, self._on_diff_value)
 
     def _on_diff_value(self, raw_value: str) -> None:
         try:
             val = _to_float(raw_value)
+            if self.stats:
+                now = time.monotonic()
+                for ring in self.stats:
+                    ring.add(now, val)
             self._attr_native_value = round(val, self._precision)
-            self.async_write_ha_state()
+            if self.stats:
+                # stav sa zapíše v takte štatistík (_StatsPublisher), nie na každý DIFF
+                self.stats_dirty = True
+            else:
+                self.async_write_ha_state()
         except Exception:
             pass
\ No newline at end of file
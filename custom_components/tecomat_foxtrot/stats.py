@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import math
+from array import array
+
+# id nepoužitého slotu – nikdy nie je číslom koša (ani záporným pri krátkom uptime)
+_NO_BIN = -(1 << 63)
+
+
+def parse_windows(raw) -> list[int]:
+    """Dĺžky okien v minútach z options flow ("5, 60") – zoradené, bez duplicít."""
+    out: set[int] = set()
+    for part in str(raw or "").replace(";", ",").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        minutes = int(part)
+        if minutes <= 0:
+            raise ValueError("window must be a positive number of minutes")
+        out.add(minutes)
+    return sorted(out)
+
+
+class WindowStats:
+    """
+    Štatistiky jedného okna displeja v pevných časových košoch (array("d")).
+    Kôš drží min, max, časovo vážený súčet a pokrytý čas, takže pamäť nezávisí
+    od frekvencie DIFF-ov a okno vždy pokrýva celých `span` sekúnd
+    (s rozlíšením jedného koša). Hodnota platí až do ďalšej vzorky.
+    """
+
+    __slots__ = ("span", "_width", "_bins", "_size", "_ids", "_min", "_max", "_area", "_dur", "_first", "_t", "last")
+
+    def __init__(self, span: float, bins: int, initial: float | None = None, now: float = 0.0):
+        self.span = span
+        self._bins = bins
+        self._width = span / bins
+        self._size = bins + 1  # + rozpracovaný kôš
+        self._ids = array("q", [_NO_BIN]) * self._size
+        self._min = array("d", [0.0]) * self._size
+        self._max = array("d", [0.0]) * self._size
+        self._area = array("d", [0.0]) * self._size
+        self._dur = array("d", [0.0]) * self._size
+        self._first = array("d", [0.0]) * self._size
+        self._t = now
+        self.last = initial
+
+    def _slot(self, n: int) -> int:
+        """Slot koša `n`; starý obsah slotu (spred `size` košov) sa zahodí."""
+        i = n % self._size
+        if self._ids[i] != n:
+            v = self.last
+            self._ids[i] = n
+            self._min[i] = math.inf if v is None else v
+            self._max[i] = -math.inf if v is None else v
+            self._area[i] = 0.0
+            self._dur[i] = 0.0
+            self._first[i] = math.nan if v is None else v
+        return i
+
+    def _advance(self, now: float) -> None:
+        """Započíta platnú hodnotu od poslednej vzorky po `now` do košov."""
+        t, v = self._t, self.last
+        if now <= t:
+            return
+        self._t = now
+        if v is None:
+            return
+        w = self._width
+        n_now = int(now // w)
+        n = max(int(t // w), n_now - self._size + 1)  # dlhé ticho: staršie koše by sa aj tak prepísali
+        for n in range(n, n_now + 1):
+            dt = min(now, (n + 1) * w) - max(t, n * w)
+            i = self._slot(n)
+            if dt > 0:
+                self._area[i] += v * dt
+                self._dur[i] += dt
+
+    def add(self, now: float, value: float) -> None:
+        self._advance(now)
+        self.last = value
+        i = self._slot(int(now // self._width))
+        if value < self._min[i]:
+            self._min[i] = value
+        if value > self._max[i]:
+            self._max[i] = value
+        if math.isnan(self._first[i]):
+            self._first[i] = value
+
+    def window(self, now: float) -> dict[str, float] | None:
+        """
+        {"min", "max", "mean" (časovo vážený), "rate" (zmena za minútu), "covered" (s)}.
+        Zmena sa delí skutočne pokrytým časom – po štarte nie je podhodnotená.
+        """
+        self._advance(now)
+        n_now = int(now // self._width)
+        lo, hi = math.inf, -math.inf
+        area = covered = 0.0
+        start = None
+        for n in range(n_now - self._bins + 1, n_now + 1):
+            i = n % self._size
+            if self._ids[i] != n:
+                continue
+            if self._min[i] < lo:
+                lo = self._min[i]
+            if self._max[i] > hi:
+                hi = self._max[i]
+            area += self._area[i]
+            covered += self._dur[i]
+            if start is None and not math.isnan(self._first[i]):
+                start = self._first[i]
+        if start is None or lo > hi:
+            return None
+        if covered <= 0:
+            return {"min": lo, "max": hi, "mean": self.last, "rate": 0.0, "covered": 0.0}
+        return {
+            "min": lo,
+            "max": hi,
+            "mean": area / covered,
+            "rate": (self.last - start) * 60.0 / covered,
+            "covered": covered,
+        }
@@ -3,9 +3,9 @@ from __future__ import annotations
 import re
 from homeassistant.components.switch import SwitchEntity
 
-from .const import DOMAIN, SOCKET_BASE
-
-RELAY_BASE = "GTSAP1_RELAY"
+from .const import DOMAIN, SOCKET_BASE, RELAY_BASE, CONF_OPTIMISTIC, CONF_OPTIMISTIC_TIMEOUT, DEFAULT_OPTIMISTIC_TIMEOUT
+from .entity import OptimisticState, PLCAvailability, PolledName, async_add_entities_staged
+from .filters import ALLOW_ALL
 
 
 def _is_numeric_like(s: str) -> bool:
@@ -46,7 +46,7 @@ def _fallback_name(base: str, plc_base: str, switch_type: str) -> str:
     return f"{ctx} Relé {num}".strip() if ctx else f"Relé {num}".strip()
 
 
-def _discover(client):
+def _discover(client, flt=ALLOW_ALL):
     items = []
     for var in client.variables:
         v_low = var.lower()
@@ -56,6 +56,8 @@ def _discover(client):
             continue
 
         base = var.rsplit("_", 1)[0]
+        if not flt.allows(base):
+            continue
         suffix = "_SOCKET" if is_socket else "_RELAY"
         plc_base = base.rsplit(suffix, 1)[0] if suffix in base.upper() else base
         items.append((var, base, plc_base, "relay" if is_relay else "socket"))
@@ -64,9 +66,9 @@ def _discover(client):
     return items
 
 
-def get_required_var_names(client) -> list[str]:
+def get_required_var_names(client, flt=ALLOW_ALL) -> list[str]:
     out: list[str] = []
-    for state_var, base, _plc_base, _stype in _discover(client):
+    for state_var, base, _plc_base, _stype in _discover(client, flt):
         out.append(client.resolve_var(f"{base}_name"))
         out.append(client.resolve_var(state_var))
     return out
@@ -77,8 +79,13 @@ async def async_setup_entry(hass, entry, async_add_entities):
     client = entry_data["client"]
     entry_id = entry.entry_id
 
-    candidates = _discover(client)
+    candidates = _discover(client, entry_data.get("filter", ALLOW_ALL))
     values = entry_data.get("initial_values_switch") or []
+    optimistic_timeout = (
+        entry.options.get(CONF_OPTIMISTIC_TIMEOUT, DEFAULT_OPTIMISTIC_TIMEOUT)
+        if entry.options.get(CONF_OPTIMISTIC, False)
+        else 0
+    )
 
     entities = []
     i = 0
@@ -102,16 +109,17 @@ async def async_setup_entry(hass, entry, async_add_entities):
                 initial_state=initial_state,
                 switch_type=stype,
                 entry_id=entry_id,
+                optimistic_timeout=optimistic_timeout,
             )
         )
 
-    async_add_entities(entities)
+    await async_add_entities_staged(hass, entry, async_add_entities, entities)
 
 
-class TecomatSwitch(SwitchEntity):
+class TecomatSwitch(PLCAvailability, SwitchEntity):
     _attr_should_poll = False
 
-    def __init__(self, name, client, base, state_var, initial_state, switch_type, entry_id):
+    def __init__(self, name, client, base, state_var, initial_state, switch_type, entry_id, optimistic_timeout=0):
         self._attr_name = name
         self._client = client
         self._state_var = self._client.resolve_var(state_var)
@@ -119,18 +127,44 @@ class TecomatSwitch(SwitchEntity):
         self._attr_unique_id = f"{DOMAIN}:{entry_id}:{base}_{switch_type}"
         self._attr_is_on = initial_state
         self._attr_device_info = {"identifiers": {(DOMAIN, entry_id)}}
+        self._optimistic = OptimisticState(self, optimistic_timeout)
+        self._polled_name = PolledName(self, client, f"{base}_name")
 
-        self._client.register_value_entity(self._state_var, self._on_diff_value)
+    async def async_added_to_hass(self) -> None:
+        # až teraz (entita má hass); zmeškané DIFF-y doručí replay
+        self._register_value(self._state_var, self._on_diff_value)
+        self._polled_name.attach()
 
     def _on_diff_value(self, raw_value: str) -> None:
+        self._optimistic.confirm()
         self._attr_is_on = (raw_value or "").strip() in ("1", "true", "TRUE")
         self.async_write_ha_state()
 
+    async def _async_command(self, is_on: bool) -> None:
+        if self._optimistic.enabled and self._attr_is_on != is_on:
+            prev = self._attr_is_on
+
+            def rollback() -> None:
+                self._attr_is_on = prev
+                self.async_write_ha_state()
+
+            self._optimistic.begin(rollback)
+            self._attr_is_on = is_on
+            self.async_write_ha_state()
+
+        try:
+            await self._client.async_set(self._state_var, "1" if is_on else "0")
+        except Exception:
+            self._optimistic.cancel()
+            raise
+
     async def async_turn_on(self, **kwargs):
-        await self._client.async_set(self._state_var, "1")
+        await self._async_command(True)
 
     async def async_turn_off(self, **kwargs):
-        await self._client.async_set(self._state_var, "0")
+        await self._async_command(False)
 
     async def async_will_remove_from_hass(self) -> None:
-        self._client.unregister_value_entity(self._state_var)
\ No newline at end of file
+        self._polled_name.detach()
+        self._optimistic.confirm()
+        self._client.unregister_value_entity(self._state_var, self._on_diff_value)
\ No newline at end of file